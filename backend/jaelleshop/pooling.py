@@ -0,0 +1,42 @@
+"""
+État des connexions à PostgreSQL du processus courant.
+
+Chaque worker gunicorn a son propre pool (ou ses propres connexions
+persistantes) : les statistiques ne concernent que le worker qui répond.
+"""
+import os
+
+from django.db import connections
+
+def connection_mode(connection):
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        return 'pool'
+    if connection.settings_dict['CONN_MAX_AGE'] != 0:
+        return 'persistent'
+    return 'per-request'
+
+def database_connection_stats():
+    databases = {}
+    for alias in connections:
+        connection = connections[alias]
+        mode = connection_mode(connection)
+        stats = {
+            'mode': mode,
+            'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        }
+        if mode == 'pool':
+            pool = connection.pool
+            stats['settings'] = {
+                'min_size': pool.min_size,
+                'max_size': pool.max_size,
+                'max_lifetime': pool.max_lifetime,
+                'max_idle': pool.max_idle,
+                'timeout': pool.timeout,
+            }
+            # pool_size, pool_available, requests_num, requests_waiting, connections_num...
+            stats['pool'] = pool.get_stats()
+        else:
+            stats['conn_max_age'] = connection.settings_dict['CONN_MAX_AGE']
+            stats['connected'] = connection.connection is not None
+        databases[alias] = stats
+    return {'pid': os.getpid(), 'databases': databases}
@@ -0,0 +1,194 @@
+"""
+Lecture sur réplicas PostgreSQL.
+
+Seules les vues qui le déclarent (use_read_replica = True) lisent sur un
+réplica, et uniquement pour les méthodes sans effet (GET, HEAD, OPTIONS).
+Tout le reste (écritures, admin, comptes utilisateurs) reste sur le primaire.
+
+Lire ses propres écritures : dès qu'une requête écrit, la suite de la
+requête lit sur le primaire, et le client reçoit un cookie qui l'y maintient
+pendant REPLICA_PIN_SECONDS.
+
+Retard de réplication : chaque réplica est interrogé au plus une fois toutes
+les REPLICA_LAG_CHECK_INTERVAL secondes ; s'il est injoignable ou en retard
+de plus de REPLICA_MAX_LAG_SECONDS, le trafic repart vers le primaire.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Retard en secondes d'un réplica : nul hors réplication (base autonome) ou
+# quand tout le WAL reçu est rejoué, même si le primaire n'écrit plus depuis longtemps.
+# Sans processus walreceiver (réplica déconnecté du primaire), le WAL reçu est
+# forcément rejoué : le retard est alors l'âge de la dernière transaction rejouée,
+# infini si aucune ne l'a été. pg_stat_wal_receiver n'a une ligne que si le
+# processus tourne, et ce test ne demande aucun privilège particulier.
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver) THEN
+            COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity'::float8)
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 0)
+    END
+"""
+
+class RoutingState:
+    """Choix de base pour la requête en cours"""
+
+    def __init__(self):
+        # La vue accepte un réplica ; il est choisi à la première lecture
+        self.use_replica = False
+        self.replica = None
+        self.pinned = False
+        self.wrote = False
+
+_state = contextvars.ContextVar('database_routing', default=None)
+
+# alias -> (instant du contrôle, retard en secondes ou None si injoignable)
+_lag_checks = {}
+
+def read_replicas():
+    return list(getattr(settings, 'READ_REPLICAS', []))
+
+def measure_lag(alias):
+    """Retard du réplica en secondes, None s'il est injoignable"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.warning("Réplica %s injoignable, lectures renvoyées vers le primaire", alias)
+        connection.close()
+        return None
+
+def replica_lag(alias):
+    """Retard mis en cache pendant REPLICA_LAG_CHECK_INTERVAL secondes"""
+    now = time.monotonic()
+    checked = _lag_checks.get(alias)
+    if checked is None or now - checked[0] >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        checked = _lag_checks[alias] = (now, measure_lag(alias))
+    return checked[1]
+
+def healthy_replicas():
+    healthy = []
+    for alias in read_replicas():
+        lag = replica_lag(alias)
+        if lag is None:
+            continue
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Réplica %s en retard de %.1f s, lectures renvoyées vers le primaire", alias, lag)
+            continue
+        healthy.append(alias)
+    return healthy
+
+def choose_replica():
+    replicas = healthy_replicas()
+    return random.choice(replicas) if replicas else None
+
+@contextmanager
+def primary_reads():
+    """
+    Force les lectures du bloc sur le primaire. À utiliser pour tout ce qui
+    est mis en cache : une donnée lue sur un réplica en retard y resterait
+    bien au-delà du retard lui-même.
+    """
+    state = _state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        # Une écriture faite dans le bloc garde le reste de la requête sur le primaire
+        state.pinned = state.wrote
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or not state.use_replica:
+            return PRIMARY
+        if state.replica is None:
+            state.replica = choose_replica() or PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Le reste de la requête doit voir cette écriture
+            state.pinned = True
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplicas contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Pas d'avis : un vrai réplica est en lecture seule et n'est jamais migré,
+        # une base de test locale peut l'être avec migrate --database
+        return None
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin_after_write(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin_after_write(state, response)
+
+    def pin_after_write(self, state, response):
+        if state.wrote and read_replicas():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or not read_replicas():
+            return None
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        state.use_replica = (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'use_read_replica', False)
+            and PIN_COOKIE not in request.COOKIES
+        )
+        return None
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -61,12 +62,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'jaelleshop.staticfiles.WhiteNoiseMiddleware',  # WhiteNoise, compatible ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'jaelleshop.timing.ServerTimingMiddleware',  # En-tête Server-Timing, profilage ?profile=1
+    'jaelleshop.replicas.ReplicaRoutingMiddleware',  # Lectures du catalogue sur réplicas
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,14 +104,95 @@ DATABASES = {
         'NAME': os.environ.get('POSTGRES_DB', 'evimeria'),
         'USER': os.environ.get('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
-        'HOST': 'db',
-        'PORT': '5432',
+        'HOST': os.environ.get('POSTGRES_HOST', 'db'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
         'OPTIONS': {
             'sslmode': 'disable'
         }
     }
 }
 
+# Connexions : un pool psycopg par processus gunicorn (DB_POOL_MAX_SIZE > 0),
+# sinon des connexions persistantes réutilisées pendant DB_CONN_MAX_AGE secondes.
+# Dans les deux cas une connexion est vérifiée avant d'être réutilisée.
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 4))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DB_POOL_MAX_SIZE > 0:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': min(int(os.environ.get('DB_POOL_MIN_SIZE', 1)), DB_POOL_MAX_SIZE),
+        'max_size': DB_POOL_MAX_SIZE,
+        # Durée de vie maximale d'une connexion, puis remplacement (avec un léger aléa)
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+        # Les connexions inactives au-delà de min_size sont fermées après ce délai
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        # Attente maximale d'une connexion libre avant erreur
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# Réplicas en lecture (facultatif) : POSTGRES_REPLICAS="hote[:port][/base],..."
+# Les valeurs absentes reprennent celles de la base principale ; deux bases
+# locales (POSTGRES_REPLICAS="localhost:5432/evimeria_replica") suffisent pour tester.
+READ_REPLICAS = []
+for index, entry in enumerate(filter(None, (e.strip() for e in os.environ.get('POSTGRES_REPLICAS', '').split(','))), start=1):
+    address, _, name = entry.partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['jaelleshop.replicas.ReplicaRouter']
+# Après une écriture, le client lit sur le primaire pendant ce délai (lire ses propres écritures)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+# Au-delà de ce retard, un réplica est écarté et ses lectures repartent vers le primaire
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+# Vues publiques du catalogue en version asynchrone, pour un serveur ASGI :
+#   CATALOG_ASYNC_VIEWS=1 gunicorn jaelleshop.asgi:application -k uvicorn_worker.UvicornWorker
+# Sous ASGI, chaque requête a son propre thread pour l'ORM : garder le pool de
+# connexions (les connexions persistantes seraient abandonnées avec le thread)
+# et le dimensionner pour le nombre de requêtes simultanées attendu par worker.
+CATALOG_ASYNC_VIEWS = os.environ.get('CATALOG_ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Jeton des robots des flux marchands pour /api/products/export/, en-tête X-Feed-Token (vide : administrateurs seulement)
+CATALOG_FEED_TOKEN = os.environ.get('CATALOG_FEED_TOKEN', '')
+
+# En-tête Server-Timing (SQL, sérialisation, rendu, total) sur chaque réponse ;
+# désactivé (par défaut), il n'est renvoyé qu'aux administrateurs identifiés par la vue
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Origine publique des URL des sitemaps (ex. https://www.evimeria.fr) ; vide : celle de la requête
+SITE_URL = os.environ.get('SITE_URL', '').rstrip('/')
+
+# Cache
+# Redis partagé entre les workers si REDIS_URL est défini, sinon cache mémoire local
+# (l'invalidation par version ne touche alors que le worker qui a fait l'écriture).
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'evimeria',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'evimeria',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,9 +239,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Assurer que Whitenoise est dans les premiers middlewares
-if 'whitenoise.middleware.WhiteNoiseMiddleware' not in MIDDLEWARE:
+if 'jaelleshop.staticfiles.WhiteNoiseMiddleware' not in MIDDLEWARE:
     # Insérer Whitenoise juste après SecurityMiddleware
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    MIDDLEWARE.insert(1, 'jaelleshop.staticfiles.WhiteNoiseMiddleware')
 
 # Configuration supplémentaire de Whitenoise
 WHITENOISE_ROOT = os.path.join(FRONTEND_DIR, 'dist')
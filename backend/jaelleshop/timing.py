@@ -0,0 +1,230 @@
+"""
+Mesure du temps passé par requête, renvoyée dans l'en-tête Server-Timing
+(affiché par l'onglet Réseau des outils de développement des navigateurs) :
+
+  db         requêtes SQL, toutes bases confondues, et leur nombre
+  serialize  sérialisation des données (DRF et chemin rapide de rows.py),
+             hors requêtes SQL déclenchées pendant la sérialisation
+  render     rendu de la réponse (JSON, API navigable)
+  total      temps passé sous ce middleware
+
+L'en-tête n'est renvoyé qu'aux administrateurs déjà identifiés par la vue
+(session ou jeton JWT), sauf si SERVER_TIMING l'active pour toutes les
+réponses : le middleware ne lit jamais la base pour en décider.
+
+Profilage : un administrateur ajoute ?profile=1 (ou l'en-tête X-Profile: 1)
+et reçoit, à la place de la réponse, le résumé cProfile de la requête. La
+valeur peut nommer le tri (?profile=tottime). Sous ASGI, seul le thread de
+la boucle d'événements est profilé : le code exécuté par sync_to_async
+(ORM) n'apparaît que par le temps passé à l'attendre.
+
+Les réponses en flux (export du catalogue) sont mesurées jusqu'au premier
+octet seulement.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject, empty
+
+PROFILE_PARAM = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_LINES = 60
+# Tris acceptés par pstats (cumulative, tottime, ncalls...)
+PROFILE_SORT_KEYS = frozenset(pstats.Stats.sort_arg_dict_default)
+
+class RequestTiming:
+    """Durées cumulées (en secondes) de la requête en cours"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.durations = {'serialize': 0.0, 'render': 0.0}
+        # Mesures en cours : une sérialisation imbriquée n'est comptée qu'une fois
+        self.active = set()
+        self.render_start = None
+
+    def server_timing(self):
+        total = time.perf_counter() - self.start
+        metrics = [f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"']
+        metrics += [f'{name};dur={duration * 1000:.1f}' for name, duration in self.durations.items()]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+_timing = contextvars.ContextVar('request_timing', default=None)
+
+def record_query(execute, sql, params, many, context):
+    """Enveloppe d'exécution installée sur chaque connexion : durée et nombre des requêtes SQL"""
+    timing = _timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db_time += time.perf_counter() - start
+        timing.queries += 1
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@receiver(connection_created)
+def on_connection_created(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+@contextmanager
+def measure(name):
+    """Ajoute la durée du bloc à la mesure `name`, hors temps SQL du bloc"""
+    timing = _timing.get()
+    if timing is None or name in timing.active:
+        yield
+        return
+    timing.active.add(name)
+    start, db_start = time.perf_counter(), timing.db_time
+    try:
+        yield
+    finally:
+        timing.active.discard(name)
+        elapsed = time.perf_counter() - start - (timing.db_time - db_start)
+        timing.durations[name] += max(elapsed, 0.0)
+
+def instrument_serializers():
+    """Mesure la sérialisation DRF : la propriété data des sérialiseurs, unitaires ou en liste"""
+    from rest_framework import serializers
+
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        data = serializer_class.data
+        if getattr(data.fget, 'measured', False):
+            continue
+
+        def measured_data(self, fget=data.fget):
+            with measure('serialize'):
+                return fget(self)
+        measured_data.measured = True
+        serializer_class.data = property(measured_data)
+
+def profile_requested(request):
+    return PROFILE_PARAM in request.GET or PROFILE_HEADER in request.META
+
+def is_staff_request(request):
+    """Administrateur connecté par session ou par jeton JWT"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    from rest_framework.exceptions import APIException
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+def is_resolved_staff(request):
+    """
+    Administrateur déjà identifié pendant la requête, sans nouvelle lecture en
+    base : l'utilisateur paresseux de la session s'il a été évalué, ou celui
+    que DRF (JWT compris) a recopié sur la requête Django.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return False
+    return user.is_authenticated and user.is_staff
+
+def profile_response(request, profiler, response):
+    """Résumé cProfile de la requête, trié selon la valeur du paramètre (cumulative par défaut)"""
+    sort = request.GET.get(PROFILE_PARAM) or request.META.get(PROFILE_HEADER)
+    if sort not in PROFILE_SORT_KEYS:
+        sort = 'cumulative'
+    output = io.StringIO()
+    output.write(f"{request.method} {request.get_full_path()} -> HTTP {response.status_code}\n\n")
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(PROFILE_LINES)
+    return HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_serializers()
+        # Connexions ouvertes avant le chargement de ce module
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # L'identification de l'administrateur lit la base : réservée aux requêtes qui demandent le profilage
+        allowed = profile_requested(request) and is_staff_request(request)
+        timing = RequestTiming()
+        token = _timing.set(timing)
+        try:
+            profiler = self.start_profiler(allowed)
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _timing.reset(token)
+        return self.finish(request, timing, profiler, response)
+
+    async def __acall__(self, request):
+        allowed = profile_requested(request) and await sync_to_async(is_staff_request)(request)
+        timing = RequestTiming()
+        token = _timing.set(timing)
+        try:
+            # Profileur démarré dans le thread de la boucle d'événements
+            profiler = self.start_profiler(allowed)
+            try:
+                response = await self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _timing.reset(token)
+        return self.finish(request, timing, profiler, response)
+
+    def start_profiler(self, allowed):
+        if not allowed:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un autre profileur est déjà actif dans ce thread
+            return None
+        return profiler
+
+    def finish(self, request, timing, profiler, response):
+        if profiler is not None:
+            response = profile_response(request, profiler, response)
+        if settings.SERVER_TIMING or profiler is not None or is_resolved_staff(request):
+            response['Server-Timing'] = timing.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        # Appelé juste avant response.render() : le rappel mesure le rendu lui-même
+        timing = _timing.get()
+        if timing is not None:
+            timing.render_start = time.perf_counter()
+
+            def rendered(response):
+                timing.durations['render'] += time.perf_counter() - timing.render_start
+            response.add_post_render_callback(rendered)
+        return response
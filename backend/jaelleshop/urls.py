@@ -20,12 +20,24 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse, JsonResponse
 from django.views.generic import TemplateView
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from products import sitemaps
 import os
+import gzip
+import hashlib
 import logging
 import socket
 import sys
+import threading
+import time
 import django
 
+try:
+    import brotli
+except ImportError:  # brotli est optionnel : seules les variantes gzip sont alors servies
+    brotli = None
+
 logger = logging.getLogger(__name__)
 
 # Une vue simple pour l'API
@@ -129,14 +141,74 @@ Settings: {settings_module}
     return HttpResponse(response_text, content_type="text/plain")
 
 # Fonction pour servir l'application React
+class ReactIndex:
+    """
+    index.html du build React, chargé une fois par worker et rechargé
+    uniquement quand son mtime change. Les variantes gzip et brotli sont
+    calculées au chargement et gardées en mémoire.
+    """
+    # Intervalle minimal entre deux os.stat du fichier
+    recheck_interval = 1.0
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.checked_at = 0.0
+        self.variants = {}
+        self.etag = None
+
+    def get(self):
+        """Renvoie (variantes, etag), ou (None, None) si le fichier n'existe pas"""
+        now = time.monotonic()
+        if self.variants and now - self.checked_at < self.recheck_interval:
+            return self.variants, self.etag
+
+        with self.lock:
+            self.checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                self.mtime, self.variants, self.etag = None, {}, None
+                return None, None
+            if mtime != self.mtime:
+                self._load(mtime)
+        return self.variants, self.etag
+
+    def _load(self, mtime):
+        with open(self.path, 'rb') as file:
+            content = file.read()
+        variants = {'identity': content, 'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(content, quality=11)
+        self.variants = variants
+        self.etag = hashlib.md5(content).hexdigest()
+        self.mtime = mtime
+        logger.info(f"index.html chargé en mémoire ({len(content)} octets, variantes : {', '.join(variants)})")
+
+def accepted_encodings(header):
+    """Codages acceptés par le client (q > 0) d'après l'en-tête Accept-Encoding"""
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+react_index = ReactIndex(os.path.join(settings.FRONTEND_DIR, 'dist', 'index.html'))
+
 def serve_react_app(request):
     """Sert l'application React frontend"""
-    logger.info("Serving React app")
-    frontend_path = os.path.join(settings.FRONTEND_DIR, 'dist', 'index.html')
-    if os.path.exists(frontend_path):
-        with open(frontend_path, 'r', encoding='utf-8') as file:
-            return HttpResponse(file.read(), content_type='text/html')
-    else:
+    variants, etag = react_index.get()
+    if variants is None:
+        frontend_path = react_index.path
         logger.error(f"Frontend file not found at {frontend_path}")
         return HttpResponse(
             f"L'application frontend n'a pas été trouvée. Vérifiez si le build React existe à l'emplacement {frontend_path}",
@@ -144,6 +216,24 @@ def serve_react_app(request):
             status=404
         )
 
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = next((name for name in ('br', 'gzip') if name in variants and name in accepted), 'identity')
+
+    # ETag propre à chaque représentation compressée
+    quoted_etag = quote_etag(etag if encoding == 'identity' else f'{etag}-{encoding}')
+    response = get_conditional_response(request, etag=quoted_etag)
+    if response is None:
+        body = variants[encoding]
+        response = HttpResponse(body, content_type='text/html; charset=utf-8')
+        response['Content-Length'] = str(len(body))
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = quoted_etag
+    # Le shell référence des assets hashés : il doit être revalidé à chaque visite
+    patch_cache_control(response, no_cache=True, public=True)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
 urlpatterns = [
     # Admin doit être en premier
     path('admin/', admin.site.urls),
@@ -161,6 +251,13 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     # path('api/orders/', include('orders.urls')),
     
+    # Sitemaps et robots.txt, avant la route attrape-tout de React
+    path('robots.txt', sitemaps.robots_txt, name='robots-txt'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap-index'),
+    path('sitemap-categories.xml', sitemaps.category_sitemap, name='sitemap-categories'),
+    path('sitemap-subcategories.xml', sitemaps.subcategory_sitemap, name='sitemap-subcategories'),
+    path('sitemap-products-<int:chunk>.xml', sitemaps.product_sitemap, name='sitemap-products'),
+    
     # Servir l'application React frontend à la racine
     path('', serve_react_app),
     # Capturer toutes les autres routes qui ne sont pas des API pour les envoyer à React
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from users.models import User, Address
 from products.models import Product
 
@@ -52,3 +54,24 @@ class OrderItem(models.Model):
     @property
     def total_price(self):
         return self.price * self.quantity
+
+def sold_quantity_subquery():
+    """Unités vendues par produit hors commandes annulées, en sous-requête"""
+    sold = OrderItem.objects.filter(product=OuterRef('pk')).exclude(
+        order__status='cancelled'
+    ).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(sold), 0)
+
+def refresh_sales_counts(product_ids=None):
+    """
+    Recalcule Product.sales_count en une requête UPDATE. Sans identifiants,
+    tous les produits sont recalculés. Un simple compteur : l'UPDATE passe par
+    le gestionnaire de base, sans invalider le cache du catalogue ni toucher
+    updated_at (sitemaps) ; le tri par popularité suit les ventes par son ETag
+    (products.sorting.SORT_VALIDATOR_FIELDS).
+    """
+    products = Product._base_manager.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    actual = sold_quantity_subquery()
+    products.alias(actual=actual).exclude(sales_count=F('actual')).update(sales_count=actual)
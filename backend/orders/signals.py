@@ -0,0 +1,42 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Order, OrderItem, refresh_sales_counts
+
+@receiver(pre_save, sender=OrderItem)
+def remember_previous_product(sender, instance, raw=False, **kwargs):
+    """Un article réaffecté à un autre produit change les ventes des deux produits"""
+    instance._previous_product_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_product_id = OrderItem.objects.filter(pk=instance.pk).values_list(
+        'product_id', flat=True
+    ).first()
+
+@receiver(post_save, sender=OrderItem)
+def update_sales_on_item_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    product_ids = {instance.product_id, getattr(instance, '_previous_product_id', None)} - {None}
+    refresh_sales_counts(product_ids)
+
+@receiver(post_delete, sender=OrderItem)
+def update_sales_on_item_delete(sender, instance, **kwargs):
+    refresh_sales_counts([instance.product_id])
+
+@receiver(pre_save, sender=Order)
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_status = Order.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+@receiver(post_save, sender=Order)
+def update_sales_on_status_change(sender, instance, created, raw=False, **kwargs):
+    """Annuler (ou réactiver) une commande retire (ou rend) ses articles aux ventes"""
+    if raw or created:
+        return
+    previous = getattr(instance, '_previous_status', None)
+    if (previous == 'cancelled') == (instance.status == 'cancelled'):
+        return
+    refresh_sales_counts(instance.items.values_list('product_id', flat=True))
@@ -7,7 +7,7 @@ class ProductImageInline(admin.TabularInline):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'is_published', 'created_at']
+    list_display = ['name', 'slug', 'is_published', 'published_product_count', 'created_at']
     list_filter = ['is_published', 'created_at', 'updated_at']
     list_editable = ['is_published']
     prepopulated_fields = {'slug': ('name',)}
@@ -26,7 +26,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(SubCategory)
 class SubCategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'slug', 'is_published', 'created_at']
+    list_display = ['name', 'category', 'slug', 'is_published', 'published_product_count', 'created_at']
     list_filter = ['is_published', 'category', 'created_at', 'updated_at']
     list_editable = ['is_published']
     prepopulated_fields = {'slug': ('name',)}
@@ -45,7 +45,7 @@ class SubCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'subcategory', 'price', 'stock', 'available', 'featured', 'is_published', 'created_at']
+    list_display = ['name', 'category', 'subcategory', 'price', 'stock', 'sales_count', 'available', 'featured', 'is_published', 'created_at']
     list_filter = ['is_published', 'available', 'featured', 'created_at', 'updated_at', 'category', 'subcategory']
     list_editable = ['price', 'stock', 'available', 'featured', 'is_published']
     prepopulated_fields = {'slug': ('name',)}
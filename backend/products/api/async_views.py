@@ -0,0 +1,257 @@
+"""
+Variantes asynchrones des vues publiques du catalogue, activées par
+CATALOG_ASYNC_VIEWS sous un serveur ASGI.
+
+Les lectures passent par l'ORM et le cache asynchrones de Django : pendant
+qu'une requête attend la base ou le cache, le worker traite les autres.
+Les réponses sont identiques octet pour octet à celles des APIView : mêmes
+sérialiseurs, même JSON, mêmes ETag. Ce que seules les APIView savent faire
+(API navigable, JSON indenté, authentification explicite) leur est délégué.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from rest_framework import exceptions, status
+
+from products.cache import aget_or_build
+from products.conditional import aconditional_response, aqueryset_validators
+from products.facets import get_facets, is_facets_requested
+from products.featured import (
+    FEATURED_LIMIT,
+    aget_featured_snapshot,
+    featured_products,
+    is_snapshot_servable,
+    snapshot_response,
+)
+from products.models import Category, Product
+from products.pagination import KeysetPagination
+from products.rows import ProductRowSerializer, get_list_serializer_class, is_fast_path_allowed, json_response
+from products.search import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, filter_products, parse_limit, search_products
+from products.serializers import (
+    CategorySerializer,
+    ProductDetailSerializer,
+    ProductSearchSerializer,
+    sparse_fieldset_params,
+)
+from products.sorting import PRODUCT_SORTS, SORT_VALIDATOR_FIELDS, resolve_product_sort
+
+from . import views
+
+async def afetch(queryset):
+    """Évalue le queryset, préchargements compris, sans bloquer la boucle"""
+    return [obj async for obj in queryset]
+
+async def apaginated_products_response(request, products, ordering=('-created_at',), facets=None):
+    """paginated_products_response pour les vues asynchrones"""
+    paginator = KeysetPagination(ordering)
+    if is_fast_path_allowed(request):
+        serializer = ProductRowSerializer(request, extra_columns=paginator.fields)
+        rows = serializer.get_queryset(products)
+        if paginator.is_legacy(request):
+            data = await serializer.ato_representation(rows.order_by(*paginator.ordering))
+            return json_response(data if facets is None else {'results': data, 'facets': facets})
+        page = await serializer.ato_representation(await paginator.apaginate_queryset(rows, request))
+    else:
+        # ?expand= : objets imbriqués, sérialiseur DRF sur des produits déjà chargés
+        serializer_class = get_list_serializer_class(request)
+        products = serializer_class.setup_eager_loading(products, request)
+        context = {'request': request}
+        if paginator.is_legacy(request):
+            data = serializer_class(await afetch(products.order_by(*paginator.ordering)), many=True, context=context).data
+            return json_response(data if facets is None else {'results': data, 'facets': facets})
+        page = serializer_class(await paginator.apaginate_queryset(products, request), many=True, context=context).data
+
+    data = {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': page,
+    }
+    if facets is not None:
+        data['facets'] = facets
+    return json_response(data)
+
+class AsyncCatalogView(View):
+    """
+    Base des vues asynchrones : négociation et en-têtes de l'APIView
+    équivalente (sync_view), erreurs au format DRF.
+    """
+    sync_view = None
+    use_read_replica = True
+    http_method_names = ['get', 'head', 'options']
+    
+    async def get(self, request, *args, **kwargs):
+        api_view = self.sync_view()
+        api_view.setup(request, *args, **kwargs)
+        api_request = api_view.initialize_request(request, *args, **kwargs)
+        api_view.format_kwarg = api_view.get_format_suffix(**kwargs)
+        try:
+            renderer, media_type = api_view.perform_content_negotiation(api_request)
+        except exceptions.NotAcceptable:
+            renderer = None
+        if (
+            renderer is None
+            or renderer.format != 'json'
+            or 'indent' in media_type
+            or 'HTTP_AUTHORIZATION' in request.META
+        ):
+            return await self.delegate(request, *args, **kwargs)
+        api_request.accepted_renderer, api_request.accepted_media_type = renderer, media_type
+        
+        try:
+            response = await self.respond(api_request, *args, **kwargs)
+        except Http404 as exc:
+            response = self.error_response(exceptions.NotFound(*exc.args))
+        except exceptions.APIException as exc:
+            response = self.error_response(exc)
+        for name, value in api_view.default_response_headers.items():
+            response.setdefault(name, value)
+        return response
+    
+    async def options(self, request, *args, **kwargs):
+        # Métadonnées DRF (Allow, description, rendus acceptés) de l'APIView
+        return await self.delegate(request, *args, **kwargs)
+    
+    async def delegate(self, request, *args, **kwargs):
+        """Réponse de l'APIView synchrone, exécutée dans un thread"""
+        return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+    
+    def error_response(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return json_response(data, status=exc.status_code)
+
+class CategoryListAsyncView(AsyncCatalogView):
+    sync_view = views.CategoryListAPIView
+    
+    async def respond(self, request):
+        async def build():
+            categories = Category.objects.filter(is_published=True)
+            return {
+                'validators': await aqueryset_validators(request, categories, related=('subcategories',)),
+                'data': CategorySerializer(
+                    await afetch(CategorySerializer.setup_eager_loading(categories, request)),
+                    many=True,
+                    context={'request': request}
+                ).data,
+            }
+        
+        cached = await aget_or_build('categories', sparse_fieldset_params(request), build)
+        
+        async def response():
+            return json_response(cached['data'])
+        return await aconditional_response(request, cached['validators'], response)
+
+class CategoryDetailAsyncView(AsyncCatalogView):
+    sync_view = views.CategoryDetailAPIView
+    
+    async def respond(self, request, slug):
+        categories = Category.objects.filter(slug=slug, is_published=True)
+        
+        async def build():
+            category = await aget_object_or_404(CategorySerializer.setup_eager_loading(categories, request))
+            return json_response(CategorySerializer(category, context={'request': request}).data)
+        
+        validators = await aqueryset_validators(request, categories, related=('subcategories',))
+        return await aconditional_response(request, validators, build)
+
+class CategoryProductsAsyncView(AsyncCatalogView):
+    sync_view = views.CategoryProductsAPIView
+    
+    async def respond(self, request, slug):
+        category = await aget_object_or_404(Category, slug=slug, is_published=True)
+        products = Product.objects.filter(category=category, available=True, is_published=True)
+        
+        async def build():
+            return await apaginated_products_response(request, products)
+        return await aconditional_response(request, await aqueryset_validators(request, products), build)
+
+class ProductListAsyncView(AsyncCatalogView):
+    sync_view = views.ProductListAPIView
+    
+    async def respond(self, request):
+        sort = resolve_product_sort(request.query_params)
+        if sort is None:
+            return json_response({'error': views.INVALID_SORT_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products, filters = views.filter_product_list(request.query_params)
+        
+        async def build():
+            # Facettes (cache et agrégations) calculées dans un thread
+            facets = None
+            if is_facets_requested(request):
+                facets = await sync_to_async(get_facets)(products, 'list', filters)
+            return await apaginated_products_response(request, products, ordering=PRODUCT_SORTS[sort], facets=facets)
+        validators = await aqueryset_validators(request, products, summed=SORT_VALIDATOR_FIELDS.get(sort, ()))
+        return await aconditional_response(request, validators, build)
+
+class ProductDetailAsyncView(AsyncCatalogView):
+    sync_view = views.ProductDetailAPIView
+    
+    async def respond(self, request, slug):
+        products = Product.objects.filter(slug=slug, available=True, is_published=True)
+        
+        async def build():
+            product = await aget_object_or_404(ProductDetailSerializer.setup_eager_loading(products, request))
+            return json_response(ProductDetailSerializer(product, context={'request': request}).data)
+        
+        validators = await aqueryset_validators(
+            request, products, related=('category', 'category__subcategories', 'subcategory')
+        )
+        return await aconditional_response(request, validators, build)
+
+class FeaturedProductsAsyncView(AsyncCatalogView):
+    sync_view = views.FeaturedProductsAPIView
+    
+    async def respond(self, request):
+        if is_snapshot_servable(request):
+            snapshot = await aget_featured_snapshot()
+            
+            async def response():
+                return snapshot_response(snapshot)
+            return await aconditional_response(request, (snapshot['etag'], snapshot['last_modified']), response)
+        
+        products = featured_products()
+        
+        async def build():
+            if is_fast_path_allowed(request):
+                serializer = ProductRowSerializer(request)
+                return json_response(
+                    await serializer.ato_representation(serializer.get_queryset(products)[:FEATURED_LIMIT])
+                )
+            serializer_class = get_list_serializer_class(request)
+            featured = await afetch(serializer_class.setup_eager_loading(products, request)[:FEATURED_LIMIT])
+            return json_response(serializer_class(featured, many=True, context={'request': request}).data)
+        return await aconditional_response(request, await aqueryset_validators(request, products), build)
+
+class ProductSearchAsyncView(AsyncCatalogView):
+    sync_view = views.ProductSearchAPIView
+    
+    async def respond(self, request):
+        query = request.query_params.get('q', '')
+        if not query:
+            return json_response({'error': "Paramètre de recherche 'q' requis"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products = Product.objects.filter(available=True, is_published=True)
+        
+        facets = None
+        if is_facets_requested(request):
+            facets = await sync_to_async(get_facets)(filter_products(products, query), 'search', {'q': query})
+        
+        limit = parse_limit(request.query_params.get('limit'), SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+        products = ProductSearchSerializer.setup_eager_loading(search_products(products, query, limit), request)
+        data = ProductSearchSerializer(await afetch(products), many=True, context={'request': request}).data
+        return json_response(data if facets is None else {'results': data, 'facets': facets})
+
+# APIView -> variante asynchrone, pour products.api.urls
+ASYNC_VARIANTS = {
+    view.sync_view: view
+    for view in (
+        CategoryListAsyncView,
+        CategoryDetailAsyncView,
+        CategoryProductsAsyncView,
+        ProductListAsyncView,
+        ProductDetailAsyncView,
+        FeaturedProductsAsyncView,
+        ProductSearchAsyncView,
+    )
+}
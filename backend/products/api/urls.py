@@ -1,11 +1,19 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+def catalog(view_class):
+    """Vue publique du catalogue, en variante asynchrone si CATALOG_ASYNC_VIEWS (serveur ASGI)"""
+    if settings.CATALOG_ASYNC_VIEWS:
+        from .async_views import ASYNC_VARIANTS
+        view_class = ASYNC_VARIANTS.get(view_class, view_class)
+    return view_class.as_view()
+
 urlpatterns = [
     # Catégories
-    path('categories/', views.CategoryListAPIView.as_view(), name='api-category-list'),
-    path('categories/<slug:slug>/', views.CategoryDetailAPIView.as_view(), name='api-category-detail'),
-    path('categories/<slug:slug>/products/', views.CategoryProductsAPIView.as_view(), name='api-category-products'),
+    path('categories/', catalog(views.CategoryListAPIView), name='api-category-list'),
+    path('categories/<slug:slug>/', catalog(views.CategoryDetailAPIView), name='api-category-detail'),
+    path('categories/<slug:slug>/products/', catalog(views.CategoryProductsAPIView), name='api-category-products'),
     
     # Sous-catégories
     path('subcategories/', views.SubCategoryListAPIView.as_view(), name='api-subcategory-list'),
@@ -14,11 +22,17 @@ urlpatterns = [
     path('subcategories/<slug:slug>/products/', views.SubCategoryProductsAPIView.as_view(), name='api-subcategory-products'),
     
     # Produits
-    path('products/', views.ProductListAPIView.as_view(), name='api-product-list'),
-    path('products/featured/', views.FeaturedProductsAPIView.as_view(), name='api-featured-products'),
-    path('products/search/', views.ProductSearchAPIView.as_view(), name='api-product-search'),
-    path('products/<slug:slug>/', views.ProductDetailAPIView.as_view(), name='api-product-detail'),
+    path('products/', catalog(views.ProductListAPIView), name='api-product-list'),
+    path('products/featured/', catalog(views.FeaturedProductsAPIView), name='api-featured-products'),
+    path('products/search/', catalog(views.ProductSearchAPIView), name='api-product-search'),
+    path('products/autocomplete/', views.ProductAutocompleteAPIView.as_view(), name='api-product-autocomplete'),
+    path('products/batch/', views.ProductBatchAPIView.as_view(), name='api-product-batch'),
+    path('products/export/', views.ProductExportAPIView.as_view(), name='api-product-export'),
+    path('products/<slug:slug>/', catalog(views.ProductDetailAPIView), name='api-product-detail'),
     
     # Seeding des données
     path('seed/', views.seed_products, name='api-seed-products'),
+    
+    # Administration
+    path('db/pool/', views.database_pool_stats, name='api-db-pool-stats'),
 ] 
\ No newline at end of file
@@ -1,61 +1,218 @@
+import hmac
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import exceptions, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny, BasePermission
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.db import router
+from django.db.models import Count
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 
+from jaelleshop.pooling import database_connection_stats
 from products.models import Category, SubCategory, Product, ProductImage
+from products.cache import get_or_build
+from products.conditional import conditional_response, queryset_validators
+from products.export import EXPORT_FORMATS, CatalogExport, aiterate
+from products.facets import get_facets, is_facets_requested
+from products.featured import (
+    FEATURED_LIMIT,
+    featured_products,
+    get_featured_snapshot,
+    is_snapshot_servable,
+    snapshot_response,
+)
+from products.pagination import KeysetPagination
+from products.rows import (
+    ProductRowSerializer,
+    get_list_serializer_class,
+    is_fast_path_allowed,
+    json_response,
+)
+from products.sorting import PRODUCT_SORTS, SORT_VALIDATOR_FIELDS, resolve_product_sort
+from products.search import (
+    AUTOCOMPLETE_DEFAULT_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    autocomplete_products,
+    filter_products,
+    parse_limit,
+    search_products,
+)
 from products.serializers import (
     CategorySerializer,
     SubCategorySerializer,
     ProductSerializer, 
     ProductDetailSerializer,
-    ProductImageSerializer
+    ProductImageSerializer,
+    ProductSearchSerializer,
+    sparse_fieldset_params
 )
 
+INVALID_SORT_MESSAGE = f"Paramètre 'sort_by' invalide, valeurs possibles : {', '.join(PRODUCT_SORTS)}"
+
+def paginated_products_response(request, products, ordering=('-created_at',), facets=None):
+    """Sérialise une page de produits, ou la liste complète pour les anciens clients"""
+    if is_fast_path_allowed(request):
+        return fast_products_response(request, products, ordering, facets)
+    
+    serializer_class = get_list_serializer_class(request)
+    products = serializer_class.setup_eager_loading(products, request)
+    context = {'request': request}
+    paginator = KeysetPagination(ordering)
+    if paginator.is_legacy(request):
+        serializer = serializer_class(products.order_by(*paginator.ordering), many=True, context=context)
+        return with_facets(serializer.data, facets)
+
+    page = paginator.paginate_queryset(products, request)
+    serializer = serializer_class(page, many=True, context=context)
+    response = paginator.get_paginated_response(serializer.data)
+    if facets is not None:
+        response.data['facets'] = facets
+    return response
+
+def fast_products_response(request, products, ordering=('-created_at',), facets=None):
+    """Même réponse que paginated_products_response, sérialisée par ProductRowSerializer"""
+    paginator = KeysetPagination(ordering)
+    serializer = ProductRowSerializer(request, extra_columns=paginator.fields)
+    rows = serializer.get_queryset(products)
+    if paginator.is_legacy(request):
+        data = serializer.to_representation(rows.order_by(*paginator.ordering))
+        return json_response(data if facets is None else {'results': data, 'facets': facets})
+    
+    page = paginator.paginate_queryset(rows, request)
+    data = {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serializer.to_representation(page),
+    }
+    if facets is not None:
+        data['facets'] = facets
+    return json_response(data)
+
+def with_facets(data, facets):
+    """Ajoute les facettes à une liste non paginée (la liste passe sous 'results')"""
+    if facets is None:
+        return Response(data)
+    return Response({'results': data, 'facets': facets})
+
+def filter_product_list(params):
+    """Produits publiés filtrés par les paramètres de /api/products/, et les filtres retenus (facettes)"""
+    products = Product.objects.filter(available=True, is_published=True)
+    
+    # Filtrage par catégorie
+    category = params.get('category')
+    if category:
+        products = products.filter(category__slug=category, category__is_published=True)
+        
+    subcategory = params.get('subcategory')
+    if subcategory:
+        products = products.filter(subcategory__slug=subcategory, subcategory__is_published=True)
+        
+    # Filtrage par prix
+    min_price = params.get('min_price')
+    if min_price:
+        products = products.filter(price__gte=min_price)
+        
+    max_price = params.get('max_price')
+    if max_price:
+        products = products.filter(price__lte=max_price)
+        
+    # Recherche
+    search = params.get('search')
+    if search:
+        products = filter_products(products, search)
+        
+    filters = {
+        'category': category,
+        'subcategory': subcategory,
+        'min_price': min_price,
+        'max_price': max_price,
+        'search': search,
+    }
+    return products, filters
+
 class CategoryListAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Récupère la liste de toutes les catégories publiées"""
-        categories = Category.objects.filter(is_published=True)
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        def build():
+            categories = Category.objects.filter(is_published=True)
+            return {
+                'validators': queryset_validators(request, categories, related=('subcategories',)),
+                'data': CategorySerializer(
+                    CategorySerializer.setup_eager_loading(categories, request),
+                    many=True,
+                    context={'request': request}
+                ).data,
+            }
+        
+        cached = get_or_build('categories', sparse_fieldset_params(request), build)
+        return conditional_response(request, cached['validators'], lambda: Response(cached['data']))
 
 class CategoryDetailAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request, slug):
         """Récupère les détails d'une catégorie spécifique publiée"""
-        category = get_object_or_404(Category, slug=slug, is_published=True)
-        serializer = CategorySerializer(category)
-        return Response(serializer.data)
+        categories = Category.objects.filter(slug=slug, is_published=True)
+        
+        def build():
+            category = get_object_or_404(CategorySerializer.setup_eager_loading(categories, request))
+            serializer = CategorySerializer(category, context={'request': request})
+            return Response(serializer.data)
+        
+        validators = queryset_validators(request, categories, related=('subcategories',))
+        return conditional_response(request, validators, build)
 
 class CategoryProductsAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request, slug):
         """Récupère tous les produits d'une catégorie spécifique publiée"""
         category = get_object_or_404(Category, slug=slug, is_published=True)
         products = Product.objects.filter(category=category, available=True, is_published=True)
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return conditional_response(
+            request,
+            queryset_validators(request, products),
+            lambda: paginated_products_response(request, products)
+        )
 
 class SubCategoryListAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Récupère la liste de toutes les sous-catégories publiées"""
-        subcategories = SubCategory.objects.filter(is_published=True)
-        serializer = SubCategorySerializer(subcategories, many=True)
-        return Response(serializer.data)
+        def build():
+            subcategories = SubCategory.objects.filter(is_published=True)
+            return {
+                'validators': queryset_validators(request, subcategories),
+                'data': SubCategorySerializer(
+                    SubCategorySerializer.setup_eager_loading(subcategories, request),
+                    many=True,
+                    context={'request': request}
+                ).data,
+            }
+        
+        cached = get_or_build('subcategories', sparse_fieldset_params(request), build)
+        return conditional_response(request, cached['validators'], lambda: Response(cached['data']))
 
 class SubCategoryByCategoryAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Récupère les sous-catégories d'une catégorie spécifique"""
@@ -66,91 +223,127 @@ class SubCategoryByCategoryAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        category = get_object_or_404(Category, slug=category_slug, is_published=True)
-        subcategories = SubCategory.objects.filter(category=category, is_published=True)
-        serializer = SubCategorySerializer(subcategories, many=True)
-        return Response(serializer.data)
+        def build():
+            category = get_object_or_404(Category, slug=category_slug, is_published=True)
+            subcategories = SubCategory.objects.filter(category=category, is_published=True)
+            return {
+                'validators': queryset_validators(request, subcategories),
+                'data': SubCategorySerializer(
+                    SubCategorySerializer.setup_eager_loading(subcategories, request),
+                    many=True,
+                    context={'request': request}
+                ).data,
+            }
+        
+        # Une catégorie inconnue lève Http404 dans build() et n'est donc pas mise en cache
+        params = {'category': category_slug, **sparse_fieldset_params(request)}
+        cached = get_or_build('subcategories-by-category', params, build)
+        return conditional_response(request, cached['validators'], lambda: Response(cached['data']))
 
 class SubCategoryDetailAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request, slug):
         """Récupère les détails d'une sous-catégorie spécifique publiée"""
-        subcategory = get_object_or_404(SubCategory, slug=slug, is_published=True)
-        serializer = SubCategorySerializer(subcategory)
-        return Response(serializer.data)
+        subcategories = SubCategory.objects.filter(slug=slug, is_published=True)
+        
+        def build():
+            subcategory = get_object_or_404(SubCategorySerializer.setup_eager_loading(subcategories, request))
+            serializer = SubCategorySerializer(subcategory, context={'request': request})
+            return Response(serializer.data)
+        
+        return conditional_response(request, queryset_validators(request, subcategories), build)
 
 class SubCategoryProductsAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request, slug):
         """Récupère tous les produits d'une sous-catégorie spécifique publiée"""
         subcategory = get_object_or_404(SubCategory, slug=slug, is_published=True)
         products = Product.objects.filter(subcategory=subcategory, available=True, is_published=True)
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return conditional_response(
+            request,
+            queryset_validators(request, products),
+            lambda: paginated_products_response(request, products)
+        )
 
 class ProductListAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Récupère la liste de tous les produits publiés"""
-        products = Product.objects.filter(available=True, is_published=True)
-        
-        # Filtrage par catégorie
-        category = request.query_params.get('category')
-        if category:
-            products = products.filter(category__slug=category, category__is_published=True)
-            
-        # Filtrage par prix
-        min_price = request.query_params.get('min_price')
-        if min_price:
-            products = products.filter(price__gte=min_price)
-            
-        max_price = request.query_params.get('max_price')
-        if max_price:
-            products = products.filter(price__lte=max_price)
-            
-        # Recherche
-        search = request.query_params.get('search')
-        if search:
-            products = products.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search)
-            )
-            
-        # Tri
-        sort_by = request.query_params.get('sort_by', 'created_at')
-        sort_order = request.query_params.get('sort_order', 'desc')
+        sort = resolve_product_sort(request.query_params)
+        if sort is None:
+            return Response({"error": INVALID_SORT_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
         
-        if sort_order == 'desc':
-            sort_by = f'-{sort_by}'
+        products, filters = filter_product_list(request.query_params)
+        return conditional_response(
+            request,
+            queryset_validators(request, products, summed=SORT_VALIDATOR_FIELDS.get(sort, ())),
+            lambda: self.build_response(request, products, filters, PRODUCT_SORTS[sort])
+        )
+    
+    def build_response(self, request, products, filters, ordering):
+        # Facettes calculées sur l'ensemble filtré, avant pagination
+        facets = None
+        if is_facets_requested(request):
+            facets = get_facets(products, 'list', filters)
             
-        products = products.order_by(sort_by)
-        
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return paginated_products_response(request, products, ordering=ordering, facets=facets)
 
 class ProductDetailAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request, slug):
         """Récupère les détails d'un produit spécifique publié"""
-        product = get_object_or_404(Product, slug=slug, available=True, is_published=True)
-        serializer = ProductDetailSerializer(product)
-        return Response(serializer.data)
+        products = Product.objects.filter(slug=slug, available=True, is_published=True)
+        
+        def build():
+            product = get_object_or_404(ProductDetailSerializer.setup_eager_loading(products, request))
+            serializer = ProductDetailSerializer(product, context={'request': request})
+            return Response(serializer.data)
+        
+        # La réponse imbrique la catégorie (et ses sous-catégories) et la sous-catégorie
+        validators = queryset_validators(
+            request, products, related=('category', 'category__subcategories', 'subcategory')
+        )
+        return conditional_response(request, validators, build)
 
 class FeaturedProductsAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Récupère les produits mis en avant et publiés"""
-        products = Product.objects.filter(featured=True, available=True, is_published=True)[:8]
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        # Réponse complète : instantané pré-encodé, régénéré à chaque modification
+        if is_snapshot_servable(request):
+            snapshot = get_featured_snapshot()
+            validators = (snapshot['etag'], snapshot['last_modified'])
+            return conditional_response(request, validators, lambda: snapshot_response(snapshot))
+        
+        products = featured_products()
+        
+        def build():
+            if is_fast_path_allowed(request):
+                serializer = ProductRowSerializer(request)
+                return json_response(serializer.to_representation(serializer.get_queryset(products)[:FEATURED_LIMIT]))
+            serializer_class = get_list_serializer_class(request)
+            serializer = serializer_class(
+                serializer_class.setup_eager_loading(products, request)[:FEATURED_LIMIT],
+                many=True,
+                context={'request': request}
+            )
+            return Response(serializer.data)
+        
+        return conditional_response(request, queryset_validators(request, products), build)
 
 class ProductSearchAPIView(APIView):
     permission_classes = [AllowAny]
+    use_read_replica = True
     
     def get(self, request):
         """Recherche de produits publiés"""
@@ -161,14 +354,154 @@ class ProductSearchAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        products = Product.objects.filter(
-            Q(name__icontains=query) | Q(description__icontains=query),
-            available=True,
-            is_published=True
-        )
+        products = Product.objects.filter(available=True, is_published=True)
+        
+        facets = None
+        if is_facets_requested(request):
+            facets = get_facets(filter_products(products, query), 'search', {'q': query})
+        
+        limit = parse_limit(request.query_params.get('limit'), SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+        products = ProductSearchSerializer.setup_eager_loading(search_products(products, query, limit), request)
         
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        serializer = ProductSearchSerializer(products, many=True, context={'request': request})
+        return with_facets(serializer.data, facets)
+
+class ProductAutocompleteAPIView(APIView):
+    permission_classes = [AllowAny]
+    use_read_replica = True
+    
+    def get(self, request):
+        """Suggestions rapides (slug, nom, prix, image) tolérantes aux fautes de frappe"""
+        query = request.query_params.get('q', '')
+        limit = parse_limit(request.query_params.get('limit'), AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT)
+        
+        return Response(autocomplete_products(query, limit))
+
+class ProductBatchAPIView(APIView):
+    permission_classes = [AllowAny]
+    use_read_replica = True
+    # Au-delà, le client doit découper sa liste
+    max_items = 100
+    
+    def get(self, request):
+        """Plusieurs produits publiés en une requête : ?slugs=a,b,c ou ?ids=1,2,3"""
+        return self.lookup(request, request.query_params)
+    
+    def post(self, request):
+        """Variante POST pour les longues listes : {"slugs": [...]} ou {"ids": [...]}"""
+        return self.lookup(request, request.data)
+    
+    def lookup(self, request, params):
+        field, keys, error = self.parse_keys(params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Deux requêtes quel que soit le nombre de produits : les produits, puis leurs images
+        products = Product.objects.filter(**{f'{field}__in': keys}, available=True, is_published=True)
+        if is_fast_path_allowed(request):
+            serializer = ProductRowSerializer(request, extra_columns=(field,))
+            found = {getattr(row, field): row for row in serializer.get_queryset(products)}
+            results = serializer.to_representation([found[key] for key in keys if key in found])
+        else:
+            serializer_class = get_list_serializer_class(request)
+            products = serializer_class.setup_eager_loading(products, request)
+            found = {getattr(product, field): product for product in products}
+            results = serializer_class(
+                [found[key] for key in keys if key in found], many=True, context={'request': request}
+            ).data
+        
+        # Résultats dans l'ordre demandé ; les produits inconnus ou non publiés sont signalés
+        data = {'results': results, 'missing': [key for key in keys if key not in found]}
+        if is_fast_path_allowed(request):
+            return json_response(data)
+        return Response(data)
+    
+    def parse_keys(self, params):
+        """(champ, clés sans doublons dans l'ordre demandé, erreur éventuelle)"""
+        # Corps JSON qui n'est pas un objet (liste, nombre...)
+        if not isinstance(params, dict):
+            return None, [], "Le corps de la requête doit être un objet JSON"
+        
+        for field, param in (('slug', 'slugs'), ('id', 'ids')):
+            value = params.get(param)
+            if value:
+                break
+        else:
+            return None, [], "Paramètre 'slugs' ou 'ids' requis"
+        
+        if isinstance(value, str):
+            value = value.split(',')
+        if not isinstance(value, (list, tuple)):
+            return None, [], f"Le paramètre '{param}' doit être une liste"
+        
+        keys = []
+        for key in value:
+            key = str(key).strip()
+            if not key:
+                continue
+            if field == 'id':
+                try:
+                    key = int(key)
+                except ValueError:
+                    return None, [], f"Identifiant invalide : {key}"
+            if key not in keys:
+                keys.append(key)
+        
+        if not keys:
+            return None, [], f"Le paramètre '{param}' est vide"
+        if len(keys) > self.max_items:
+            return None, [], f"{self.max_items} produits au maximum par requête"
+        return field, keys, None
+
+class IsAdminOrFeedToken(BasePermission):
+    """
+    Administrateur, ou robot d'un flux marchand muni de l'en-tête
+    X-Feed-Token: CATALOG_FEED_TOKEN. Jamais dans l'URL : elle finit dans les
+    journaux d'accès, ceux des proxys et l'en-tête Referer.
+    """
+    
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = settings.CATALOG_FEED_TOKEN
+        sent = request.headers.get('X-Feed-Token', '')
+        return bool(token) and hmac.compare_digest(sent.encode('utf-8'), token.encode('utf-8'))
+
+class ProductExportAPIView(APIView):
+    """
+    Catalogue publié complet, en flux : ?output=ndjson (défaut) ou ?output=csv.
+    Compressé en gzip au fil de l'eau si le client l'accepte.
+    """
+    permission_classes = [IsAdminOrFeedToken]
+    use_read_replica = True
+    
+    def permission_denied(self, request, message=None, code=None):
+        # 403 plutôt que 401 : le jeton des robots n'est pas un jeton Bearer (WWW-Authenticate)
+        raise exceptions.PermissionDenied(detail=message, code=code)
+    
+    def get(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Paramètre 'output' invalide, valeurs possibles : {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Le flux est lu après la sortie de la vue : la base est choisie maintenant
+        export = CatalogExport(export_format, using=router.db_for_read(Product))
+        content = iter(export)
+        compressed = bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        if compressed:
+            content = compress_sequence(content)
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+        
+        response = StreamingHttpResponse(content, content_type=export.content_type)
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Disposition'] = f'attachment; filename="{export.filename}"'
+        return response
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
@@ -185,4 +518,10 @@ def seed_products(request):
         return Response(
             {"error": str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        ) 
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def database_pool_stats(request):
+    """État du pool de connexions du worker qui répond (voir le champ pid)"""
+    return Response(database_connection_stats())
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from jaelleshop.replicas import primary_reads
+
+# Toutes les clés du catalogue incluent ce numéro de version : l'incrémenter
+# rend d'un coup obsolètes toutes les réponses mises en cache.
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Version initiale horodatée pour ne jamais retomber sur d'anciennes clés
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+async def aget_catalog_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+def bump_catalog_version():
+    """Invalide toutes les réponses du catalogue mises en cache"""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+
+def invalidate_catalog(using=None):
+    """
+    Invalide le cache du catalogue après validation de la transaction en
+    cours (immédiatement hors transaction) : invalidé plus tôt, il pourrait
+    être reconstruit à partir des données d'avant l'écriture et garder
+    celles-ci sous la nouvelle version.
+    """
+    transaction.on_commit(bump_catalog_version, using=using)
+
+def catalog_cache_key(name, params=None, version=None):
+    if version is None:
+        version = get_catalog_version()
+    key = f'catalog:{version}:{name}'
+    if params:
+        normalized = sorted((k, str(v)) for k, v in params.items() if v not in (None, ''))
+        key += ':' + hashlib.sha1(json.dumps(normalized).encode('utf-8')).hexdigest()
+    return key
+
+def get_or_build(name, params, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Renvoie les données mises en cache sous la version courante, sinon les
+    construit avec build() (ORM + sérialisation) et les met en cache.
+    """
+    key = catalog_cache_key(name, params)
+    data = cache.get(key)
+    if data is None:
+        # Ce qui est mis en cache est lu sur le primaire, jamais sur un réplica en retard
+        with primary_reads():
+            data = build()
+        cache.set(key, data, timeout)
+    return data
+
+async def aget_or_build(name, params, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """get_or_build pour les vues asynchrones : build est une coroutine"""
+    key = catalog_cache_key(name, params, version=await aget_catalog_version())
+    data = await cache.aget(key)
+    if data is None:
+        with primary_reads():
+            data = await build()
+        await cache.aset(key, data, timeout)
+    return data
@@ -0,0 +1,79 @@
+import hashlib
+import json
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+def queryset_validators(request, queryset, related=(), summed=()):
+    """
+    (ETag, Last-Modified) d'une réponse construite à partir de queryset, en une
+    seule requête d'agrégation : MAX(updated_at) et nombre de lignes de la
+    table principale et de chaque relation imbriquée dans la réponse, somme
+    des champs `summed` (modifiés sans updated_at), plus le chemin et les
+    paramètres de la requête.
+    """
+    result = queryset.order_by().aggregate(**validator_aggregates(related, summed))
+    return validators_from_aggregates(request, result)
+
+async def aqueryset_validators(request, queryset, related=(), summed=()):
+    """queryset_validators pour les vues asynchrones"""
+    result = await queryset.order_by().aaggregate(**validator_aggregates(related, summed))
+    return validators_from_aggregates(request, result)
+
+def validator_aggregates(related=(), summed=()):
+    aggregates = {'last': Max('updated_at'), 'count': Count('pk', distinct=True)}
+    for field in summed:
+        aggregates[f'{field}_sum'] = Sum(field)
+    for relation in related:
+        aggregates[f'{relation}_last'] = Max(f'{relation}__updated_at')
+        aggregates[f'{relation}_count'] = Count(relation, distinct=True)
+    return aggregates
+
+def validators_from_aggregates(request, result):
+    if not result['count']:
+        return None, None
+
+    stamps = [value for key, value in result.items() if key.endswith('_last') or key == 'last']
+    last_modified = max(stamp for stamp in stamps if stamp is not None)
+    parts = [request.path, sorted(request.query_params.lists()), sorted(result.items())]
+    etag = hashlib.md5(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+    return etag, last_modified
+
+def conditional_response(request, validators, build_response):
+    """
+    Répond 304 sans rien sérialiser si le client possède déjà la version
+    courante, sinon construit la réponse et y ajoute ETag et Last-Modified.
+    Sans validateurs (aucune ligne), la réponse est construite normalement.
+    """
+    etag, last_modified = validators
+    if etag is None:
+        return build_response()
+
+    quoted_etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=quoted_etag, last_modified=timestamp)
+    if response is None:
+        response = build_response()
+    return add_validators(response, quoted_etag, timestamp)
+
+async def aconditional_response(request, validators, build_response):
+    """conditional_response pour les vues asynchrones : build_response est une coroutine"""
+    etag, last_modified = validators
+    if etag is None:
+        return await build_response()
+
+    quoted_etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=quoted_etag, last_modified=timestamp)
+    if response is None:
+        response = await build_response()
+    return add_validators(response, quoted_etag, timestamp)
+
+def add_validators(response, quoted_etag, timestamp):
+    if response.status_code in (200, 304):
+        response['ETag'] = quoted_etag
+        response['Last-Modified'] = http_date(timestamp)
+        # Le client garde sa copie mais doit la revalider à chaque visite
+        patch_cache_control(response, no_cache=True)
+    return response
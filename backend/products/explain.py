@@ -0,0 +1,44 @@
+import json
+
+from django.db import connection
+
+from .models import Product
+
+PRODUCT_TABLE = Product._meta.db_table
+
+def find_page_query(queries):
+    """Parmi les requêtes capturées, celle qui lit une page de produits (triée et limitée)"""
+    for query in queries:
+        sql = query['sql']
+        if f'FROM "{PRODUCT_TABLE}"' in sql and 'ORDER BY' in sql and 'LIMIT' in sql:
+            return sql
+    return None
+
+def explain(sql, analyze=False):
+    """Plan PostgreSQL (nœud racine) de la requête, exécutée si analyze est vrai"""
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN ({options}) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+def scan_plan(node):
+    """
+    (index utilisés, anomalies) dans tout le plan. Un parcours séquentiel
+    des produits ou un tri explicite signifient que l'index ne sert pas.
+    """
+    indexes = set()
+    problems = []
+    if 'Index Name' in node:
+        indexes.add(node['Index Name'])
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == PRODUCT_TABLE:
+        problems.append('Seq Scan')
+    if node.get('Node Type') in ('Sort', 'Incremental Sort'):
+        problems.append(node['Node Type'])
+    for child in node.get('Plans', []):
+        child_indexes, child_problems = scan_plan(child)
+        indexes |= child_indexes
+        problems += child_problems
+    return indexes, problems
@@ -0,0 +1,108 @@
+"""
+Export du catalogue publié pour les flux marchands (Google Shopping,
+marketplaces), en NDJSON ou en CSV.
+
+Les produits sont lus par paquets à travers un curseur côté serveur et
+encodés au fil de l'eau : la mémoire utilisée dépend de la taille des
+paquets, pas de celle du catalogue.
+"""
+import csv
+import io
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .models import PUBLIC_PRODUCTS, Product
+from .rows import ProductRowSerializer, render_json
+
+EXPORT_FIELDS = [
+    'id', 'name', 'slug', 'description', 'price', 'stock', 'available', 'featured',
+    'category', 'category_name', 'subcategory', 'subcategory_name',
+    'main_image_url', 'image_count', 'created_at',
+]
+# Le NDJSON ajoute la liste complète des images (images additionnelles des flux)
+NDJSON_FIELDS = EXPORT_FIELDS + ['images']
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+class CatalogExport:
+    """
+    Itérable d'octets du catalogue exporté, un morceau par paquet de
+    produits. `rows` compte les produits déjà encodés.
+    """
+
+    def __init__(self, export_format='ndjson', using=None, chunk_size=EXPORT_CHUNK_SIZE):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Format d'export inconnu : {export_format}")
+        self.format = export_format
+        self.using = using
+        self.chunk_size = chunk_size
+        self.rows = 0
+
+    @property
+    def content_type(self):
+        return EXPORT_FORMATS[self.format]
+
+    @property
+    def filename(self):
+        return f"catalogue-{timezone.now():%Y%m%d}.{self.format}"
+
+    def __iter__(self):
+        if self.format == 'csv':
+            return self.iter_csv()
+        return self.iter_ndjson()
+
+    def chunks(self, fields):
+        """Produits publiés par ordre d'id, sérialisés paquet par paquet"""
+        serializer = ProductRowSerializer(fields=fields, using=self.using)
+        queryset = Product.objects.using(self.using).filter(PUBLIC_PRODUCTS).order_by('id')
+        # Sur PostgreSQL, iterator() lit à travers un curseur côté serveur
+        rows = serializer.get_queryset(queryset).iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(rows, self.chunk_size)):
+            items = serializer.to_representation(chunk)
+            self.rows += len(items)
+            yield items
+
+    def iter_ndjson(self):
+        for items in self.chunks(NDJSON_FIELDS):
+            yield b''.join(render_json(item) + b'\n' for item in items)
+
+    def iter_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for items in self.chunks(EXPORT_FIELDS):
+            for item in items:
+                writer.writerow([csv_value(item.get(name)) for name in EXPORT_FIELDS])
+            yield self.drain(buffer)
+        # Catalogue vide : l'en-tête seul
+        if buffer.tell():
+            yield self.drain(buffer)
+
+    @staticmethod
+    def drain(buffer):
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+async def aiterate(iterator):
+    """
+    Itérateur asynchrone sur un itérateur synchrone, un morceau à la fois :
+    sous ASGI, Django chargerait sinon tout le flux en mémoire avant l'envoi.
+    """
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
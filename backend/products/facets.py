@@ -0,0 +1,90 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from jaelleshop.replicas import primary_reads
+
+from .cache import get_catalog_version
+from .models import Category, SubCategory
+
+# Tranches de prix proposées comme filtres (bornes en euros, max exclu)
+PRICE_BUCKETS = [(None, 25), (25, 50), (50, 100), (100, 200), (200, None)]
+FACETS_CACHE_TIMEOUT = 60 * 5
+
+def is_facets_requested(request):
+    return request.query_params.get('facets', '').lower() in ('1', 'true', 'yes')
+
+# Filtres plein texte : la recherche (tsquery) ignore la casse et les espaces autour.
+# Les autres (slugs, prix) sont comparés tels quels par le queryset et gardés intacts.
+TEXT_FILTERS = frozenset({'search', 'q'})
+
+def facets_cache_key(scope, params):
+    """Clé de cache indépendante de l'ordre des filtres, liée à la version du catalogue"""
+    normalized = sorted(
+        (name, str(value).strip().lower() if name in TEXT_FILTERS else str(value))
+        for name, value in params.items() if value not in (None, '')
+    )
+    digest = hashlib.sha1(json.dumps([scope, normalized]).encode('utf-8')).hexdigest()
+    return f'product-facets:{get_catalog_version()}:{digest}'
+
+def get_facets(queryset, scope, params):
+    """Facettes du jeu de filtres courant, mises en cache par filtres normalisés"""
+    key = facets_cache_key(scope, params)
+    facets = cache.get(key)
+    if facets is None:
+        with primary_reads():
+            facets = compute_facets(queryset)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+def _price_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+def compute_facets(queryset):
+    """
+    Compte les produits par catégorie, sous-catégorie, tranche de prix et
+    disponibilité en une seule requête d'agrégation conditionnelle
+    (COUNT(*) FILTER (WHERE ...) pour chaque valeur de facette).
+    """
+    categories = list(Category.objects.filter(is_published=True).values_list('id', 'slug', 'name'))
+    subcategories = list(
+        SubCategory.objects.filter(is_published=True).values_list('id', 'slug', 'name', 'category__slug')
+    )
+
+    aggregates = {'total': Count('pk')}
+    for category_id, _, _ in categories:
+        aggregates[f'category_{category_id}'] = Count('pk', filter=Q(category_id=category_id))
+    for subcategory_id, _, _, _ in subcategories:
+        aggregates[f'subcategory_{subcategory_id}'] = Count('pk', filter=Q(subcategory_id=subcategory_id))
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{index}'] = Count('pk', filter=_price_filter(low, high))
+    aggregates['in_stock'] = Count('pk', filter=Q(stock__gt=0))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        'total': counts['total'],
+        'categories': [
+            {'slug': slug, 'name': name, 'count': counts[f'category_{category_id}']}
+            for category_id, slug, name in categories
+        ],
+        'subcategories': [
+            {'slug': slug, 'name': name, 'category': category_slug, 'count': counts[f'subcategory_{subcategory_id}']}
+            for subcategory_id, slug, name, category_slug in subcategories
+        ],
+        'price': [
+            {'min': low, 'max': high, 'count': counts[f'price_{index}']}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'availability': {
+            'in_stock': counts['in_stock'],
+            'out_of_stock': counts['total'] - counts['in_stock'],
+        },
+    }
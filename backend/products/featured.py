@@ -0,0 +1,57 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .cache import CATALOG_CACHE_TIMEOUT, aget_or_build, get_or_build
+from .models import Product
+from .rows import ProductRowSerializer, get_list_serializer_class, is_fast_path_allowed, render_json
+from .serializers import ProductSerializer, sparse_fieldset_params
+
+FEATURED_LIMIT = 8
+# Ordre total : deux produits créés au même instant restent toujours dans le même ordre
+FEATURED_ORDERING = ('-created_at', '-id')
+# ETag et Last-Modified du dernier instantané : un instantané reconstruit à
+# l'identique (autre produit modifié) garde son Last-Modified
+FEATURED_VALIDATORS_KEY = 'catalog:featured-validators'
+
+def featured_products():
+    return Product.objects.filter(featured=True, available=True, is_published=True).order_by(*FEATURED_ORDERING)
+
+def build_featured_snapshot():
+    """Liste des produits mis en avant, déjà encodée en JSON, avec son ETag"""
+    serializer = ProductRowSerializer()
+    data = serializer.to_representation(serializer.get_queryset(featured_products())[:FEATURED_LIMIT])
+    content = render_json(data)
+    etag = hashlib.md5(content).hexdigest()
+    previous = cache.get(FEATURED_VALIDATORS_KEY)
+    if previous is not None and previous['etag'] == etag:
+        last_modified = previous['last_modified']
+    else:
+        last_modified = timezone.now()
+        cache.set(FEATURED_VALIDATORS_KEY, {'etag': etag, 'last_modified': last_modified}, CATALOG_CACHE_TIMEOUT)
+    return {'content': content, 'etag': etag, 'last_modified': last_modified}
+
+def get_featured_snapshot():
+    """
+    Instantané mis en cache sous la version du catalogue : toute écriture
+    sur le catalogue (produit, nom de catégorie) le rend obsolète, et il est
+    reconstruit à la première demande qui suit.
+    """
+    return get_or_build('featured-snapshot', None, build_featured_snapshot)
+
+async def aget_featured_snapshot():
+    return await aget_or_build('featured-snapshot', None, sync_to_async(build_featured_snapshot))
+
+def is_snapshot_servable(request):
+    """L'instantané correspond à la réponse JSON complète, sans ?view=card, ?fields=, ?omit= ni ?expand="""
+    return (
+        is_fast_path_allowed(request)
+        and get_list_serializer_class(request) is ProductSerializer
+        and not any(sparse_fieldset_params(request).values())
+    )
+
+def snapshot_response(snapshot):
+    return HttpResponse(snapshot['content'], content_type='application/json')
@@ -0,0 +1,70 @@
+"""
+URL d'images Cloudinary adaptées à l'affichage : largeur bornée, format
+(f_auto) et qualité (q_auto) choisis par Cloudinary selon le navigateur.
+
+Les URL stockées pointent vers l'original pleine taille. Les variantes sont
+dérivées par simple réécriture de l'URL de livraison, sans appel à l'API
+Cloudinary : la transformation est appliquée par le CDN à la première
+demande, puis mise en cache de son côté.
+"""
+import re
+from functools import lru_cache
+
+# Largeurs proposées dans srcset
+RESPONSIVE_WIDTHS = (200, 400, 800, 1600)
+
+# .../image/upload/[transformations/][v<version>/]<public_id>.<ext>
+CLOUDINARY_UPLOAD_RE = re.compile(r'res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/(?P<path>[^?#]+)')
+# Segment de transformations : paramètres "<clé>_<valeur>" séparés par des virgules
+TRANSFORMATION_RE = re.compile(r'^[a-z]{1,3}_[^,/]+(?:,[a-z]{1,3}_[^,/]+)*$')
+VERSION_RE = re.compile(r'^v\d+$')
+# Transformation ajoutée par ce module, reconnue pour être remplacée plutôt qu'empilée
+RESPONSIVE_TRANSFORMATION_RE = re.compile(r'^c_limit,w_\d+,f_auto,q_auto$')
+
+def responsive_transformation(width):
+    return f'c_limit,w_{width},f_auto,q_auto'
+
+def split_cloudinary_url(url):
+    """
+    (base, transformations, reste) d'une URL de livraison Cloudinary, None
+    pour toute autre URL. Les transformations ajoutées par ce module sont
+    retirées et la base est toujours en https.
+    """
+    match = CLOUDINARY_UPLOAD_RE.search(url or '')
+    if match is None:
+        return None
+    segments = match.group('path').split('/')
+    transformations = []
+    # Le dernier segment est toujours l'identifiant public, jamais une transformation
+    while len(segments) > 1 and TRANSFORMATION_RE.match(segments[0]) and not VERSION_RE.match(segments[0]):
+        segment = segments.pop(0)
+        if not RESPONSIVE_TRANSFORMATION_RE.match(segment):
+            transformations.append(segment)
+    base = f"https://res.cloudinary.com/{match.group('cloud')}/image/upload"
+    return base, transformations, '/'.join(segments)
+
+def responsive_url(url, width):
+    """URL de l'image limitée à `width` pixels de large ; les autres URL sont renvoyées telles quelles"""
+    parts = split_cloudinary_url(url)
+    if parts is None:
+        return url
+    base, transformations, rest = parts
+    return '/'.join([base, *transformations, responsive_transformation(width), rest])
+
+def original_url(url):
+    """URL de l'original, sans la transformation ajoutée par responsive_url"""
+    parts = split_cloudinary_url(url)
+    if parts is None:
+        return url
+    base, transformations, rest = parts
+    return '/'.join([base, *transformations, rest])
+
+@lru_cache(maxsize=20000)
+def image_srcset(url):
+    """
+    Valeur de l'attribut srcset pour une image Cloudinary, None pour les
+    autres. Mémoïsé : les mêmes images reviennent dans toutes les réponses.
+    """
+    if split_cloudinary_url(url) is None:
+        return None
+    return ', '.join(f'{responsive_url(url, width)} {width}w' for width in RESPONSIVE_WIDTHS)
@@ -0,0 +1,207 @@
+"""
+Outils des bancs d'essai HTTP : serveur gunicorn lancé le temps d'une mesure
+et charge en boucle fermée (chaque client enchaîne ses requêtes).
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from .models import Category, Product
+
+WSGI_APP = 'jaelleshop.wsgi:application'
+ASGI_APP = 'jaelleshop.asgi:application'
+ASGI_WORKER_CLASS = 'uvicorn_worker.UvicornWorker'
+
+class GunicornServer:
+    """Serveur gunicorn lancé sur un port libre le temps d'une mesure"""
+
+    def __init__(self, env, workers=1, threads=1, app=WSGI_APP, worker_class=None):
+        self.env = {**os.environ, **env}
+        self.workers = workers
+        self.threads = threads
+        self.app = app
+        self.worker_class = worker_class
+        self.process = None
+
+    def __enter__(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        command = [
+            sys.executable, '-m', 'gunicorn', self.app,
+            '--bind', f'127.0.0.1:{port}', '--workers', str(self.workers),
+            '--threads', str(self.threads), '--log-level', 'warning',
+        ]
+        if self.worker_class:
+            command += ['--worker-class', self.worker_class]
+        self.process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=self.env)
+        base_url = f'http://127.0.0.1:{port}'
+        self.wait_until_ready(base_url + reverse('health'))
+        # Premier passage de chaque worker (imports, caches) hors mesure
+        for _ in range(self.workers * 4):
+            urllib.request.urlopen(base_url + reverse('api-product-list'), timeout=30).read()
+        return base_url
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+    def wait_until_ready(self, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError("gunicorn s'est arrêté au démarrage")
+            try:
+                urllib.request.urlopen(url, timeout=1).read()
+                return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        self.process.terminate()
+        raise CommandError("gunicorn ne répond pas")
+
+class LatencyProxy:
+    """
+    Proxy TCP vers PostgreSQL qui retarde chaque réponse de `delay` secondes :
+    simule une base distante (aller-retour réseau) avec une base locale.
+    """
+
+    def __init__(self, host, port, delay):
+        self.target = (host, int(port))
+        self.delay = delay
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.port = None
+
+    def __enter__(self):
+        ready = threading.Event()
+        threading.Thread(target=self.run, args=(ready,), daemon=True).start()
+        ready.wait()
+        return self.port
+
+    def __exit__(self, *exc_info):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, '127.0.0.1', 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def handle(self, client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(*self.target)
+        await asyncio.gather(
+            self.pipe(client_reader, server_writer, 0),
+            self.pipe(server_reader, client_writer, self.delay),
+        )
+
+    async def pipe(self, reader, writer, delay):
+        try:
+            while data := await reader.read(65536):
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def catalog_paths():
+    """Endpoints publics du catalogue, avec un produit et une catégorie réels"""
+    product = Product.objects.filter(available=True, is_published=True).first()
+    category = Category.objects.filter(products__available=True, products__is_published=True).first()
+    if product is None or category is None:
+        raise CommandError("Aucun produit publié : peuplez d'abord la base")
+    return [
+        reverse('api-product-list'),
+        reverse('api-category-list'),
+        reverse('api-category-products', args=[category.slug]),
+        reverse('api-product-detail', args=[product.slug]),
+        reverse('api-featured-products'),
+        reverse('api-product-search') + '?q=' + product.name.split()[0],
+    ]
+
+def run_load(base_url, paths, concurrency, duration):
+    """Requêtes en boucle pendant `duration` secondes : (req/s, latences en ms, nombre d'erreurs)"""
+    result = run_requests(base_url, [LoadRequest(path) for path in paths], concurrency, duration)
+    if not result['latencies']:
+        raise CommandError("Aucune requête n'a abouti")
+    return result['rps'], result['latencies'], result['errors']
+
+class LoadRequest:
+    """Requête rejouée par run_requests : méthode, chemin, corps JSON éventuel et en-têtes"""
+
+    def __init__(self, path, method='GET', data=None, headers=None):
+        self.path = path
+        self.method = method
+        self.body = json.dumps(data).encode('utf-8') if data is not None else None
+        self.headers = dict(headers or {})
+        if self.body is not None:
+            self.headers.setdefault('Content-Type', 'application/json')
+
+    def build(self, base_url):
+        return urllib.request.Request(base_url + self.path, data=self.body, headers=self.headers, method=self.method)
+
+def run_requests(base_url, requests, concurrency, duration):
+    """
+    Requêtes en boucle pendant `duration` secondes, chaque client enchaînant
+    les requêtes de la liste. Renvoie req/s, latences (ms) des réponses 2xx et
+    3xx, nombre d'erreurs et octets reçus.
+    """
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        latencies, errors, received, index = [], 0, 0, offset
+        while time.perf_counter() < deadline:
+            request = requests[index % len(requests)].build(base_url)
+            index += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    received += len(response.read())
+            except (urllib.error.URLError, OSError):
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, errors, received
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for outcome in outcomes for latency in outcome[0]]
+    return {
+        'rps': len(latencies) / elapsed,
+        'latencies': latencies,
+        'errors': sum(outcome[1] for outcome in outcomes),
+        'bytes': sum(outcome[2] for outcome in outcomes),
+    }
+
+def api_routes():
+    """Routes nommées de products.api.urls et users.api.urls, sous le nom utilisable par reverse()"""
+    from products.api import urls as product_urls
+    from users.api import urls as user_urls
+
+    routes = []
+    for module, namespace in ((product_urls, ''), (user_urls, 'users:')):
+        for pattern in module.urlpatterns:
+            routes.append((namespace + pattern.name, str(pattern.pattern)))
+    return routes
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
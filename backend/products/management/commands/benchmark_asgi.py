@@ -0,0 +1,78 @@
+import statistics
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.loadtest import (
+    ASGI_APP,
+    ASGI_WORKER_CLASS,
+    WSGI_APP,
+    GunicornServer,
+    LatencyProxy,
+    catalog_paths,
+    percentile,
+    run_load,
+)
+
+class Command(BaseCommand):
+    help = (
+        "Compare un worker gunicorn WSGI synchrone (configuration du Dockerfile) et un worker "
+        "ASGI uvicorn servant les vues asynchrones du catalogue, à plusieurs niveaux de concurrence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, action='append',
+                            help="Clients simultanés (répétable, défaut : 1, 16 et 64)")
+        parser.add_argument('--duration', type=float, default=10,
+                            help="Durée de mesure par palier, en secondes (défaut : 10)")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Workers de chaque serveur (défaut : 1)")
+        parser.add_argument('--pool-size', type=int, default=20,
+                            help="Connexions maximum du pool par worker ASGI (défaut : 20)")
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help="Délai ajouté à chaque réponse de PostgreSQL, en ms, pour simuler une base distante")
+
+    def handle(self, *args, **options):
+        paths = catalog_paths()
+        levels = options['concurrency'] or [1, 16, 64]
+
+        with ExitStack() as stack:
+            env = {}
+            if options['db_latency'] > 0:
+                database = settings.DATABASES['default']
+                port = stack.enter_context(
+                    LatencyProxy(database['HOST'], database['PORT'], options['db_latency'] / 1000)
+                )
+                env = {'POSTGRES_HOST': '127.0.0.1', 'POSTGRES_PORT': str(port)}
+            servers = {
+                'WSGI sync': GunicornServer(
+                    {**env, 'CATALOG_ASYNC_VIEWS': '0'}, workers=options['workers'], app=WSGI_APP
+                ),
+                'ASGI uvicorn': GunicornServer(
+                    {**env, 'CATALOG_ASYNC_VIEWS': '1', 'DB_POOL_MAX_SIZE': str(options['pool_size'])},
+                    workers=options['workers'], app=ASGI_APP, worker_class=ASGI_WORKER_CLASS,
+                ),
+            }
+
+            self.stdout.write(
+                f"{options['workers']} worker(s), {options['duration']:g} s par palier, {len(paths)} endpoints, "
+                f"latence base +{options['db_latency']:g} ms"
+            )
+            results = {}
+            for name, server in servers.items():
+                with server as base_url:
+                    for concurrency in levels:
+                        rps, latencies, errors = results[name, concurrency] = run_load(
+                            base_url, paths, concurrency, options['duration']
+                        )
+                        line = (f"{name:<13} {concurrency:>4} clients {rps:8.1f} req/s  "
+                                f"p50 {statistics.median(latencies):7.1f} ms  p95 {percentile(latencies, 95):7.1f} ms")
+                        if errors:
+                            self.stdout.write(self.style.ERROR(f"{line}  {errors} erreurs"))
+                        else:
+                            self.stdout.write(self.style.SUCCESS(line))
+
+        for concurrency in levels:
+            ratio = results['ASGI uvicorn', concurrency][0] / results['WSGI sync', concurrency][0]
+            self.stdout.write(f"{concurrency:>4} clients : ASGI ×{ratio:.2f} par rapport à WSGI")
@@ -0,0 +1,54 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from products.loadtest import GunicornServer, catalog_paths, percentile, run_load
+
+# Configuration des connexions de chaque serveur lancé (variables lues par settings.py)
+MODES = {
+    'sans persistance': {'DB_POOL_MAX_SIZE': '0', 'DB_CONN_MAX_AGE': '0'},
+    'persistantes': {'DB_POOL_MAX_SIZE': '0', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {},
+}
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des endpoints du catalogue sous gunicorn sans connexions persistantes, "
+        "avec connexions persistantes et avec le pool psycopg"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=1,
+                            help="Threads par worker gunicorn (défaut : 1, workers synchrones)")
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help="Clients simultanés (défaut : 8)")
+        parser.add_argument('--duration', type=float, default=10,
+                            help="Durée de mesure par configuration, en secondes (défaut : 10)")
+        parser.add_argument('--mode', action='append', choices=list(MODES),
+                            help="Configuration à mesurer (répétable, défaut : toutes)")
+
+    def handle(self, *args, **options):
+        paths = catalog_paths()
+
+        self.stdout.write(
+            f"{options['workers']} workers × {options['threads']} thread(s), "
+            f"{options['concurrency']} clients, {options['duration']:g} s par configuration"
+        )
+        results = {}
+        for mode in options['mode'] or MODES:
+            with GunicornServer(MODES[mode], workers=options['workers'], threads=options['threads']) as base_url:
+                results[mode] = run_load(base_url, paths, options['concurrency'], options['duration'])
+            rps, latencies, errors = results[mode]
+            line = (f"{mode:<17} {rps:8.1f} req/s  p50 {statistics.median(latencies):6.1f} ms  "
+                    f"p95 {percentile(latencies, 95):6.1f} ms")
+            if errors:
+                self.stdout.write(self.style.ERROR(f"{line}  {errors} erreurs"))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+
+        baseline = results.get('sans persistance')
+        if baseline:
+            for mode, (rps, _, _) in results.items():
+                if mode != 'sans persistance':
+                    self.stdout.write(f"{mode} : ×{rps / baseline[0]:.2f} par rapport à sans persistance")
@@ -0,0 +1,338 @@
+import json
+import secrets
+import statistics
+import subprocess
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from products.loadtest import (
+    ASGI_APP,
+    ASGI_WORKER_CLASS,
+    WSGI_APP,
+    GunicornServer,
+    LoadRequest,
+    api_routes,
+    percentile,
+    run_requests,
+)
+from products.models import PUBLIC_PRODUCTS, Category, Product, SubCategory
+
+# Compte administrateur des routes authentifiées, créé avec un mot de passe
+# aléatoire au début de chaque exécution et supprimé à la fin, avec les jetons
+# émis pour lui (domaine des données synthétiques de generate_catalog)
+BENCHMARK_EMAIL = 'benchmark@synthetic.invalid'
+
+# Cache privé du comptage des requêtes SQL : le cache froid de chaque route
+# est obtenu en le vidant, sans toucher au cache partagé de l'application
+QUERY_COUNT_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-endpoints'},
+}
+
+# Routes jamais mesurées : elles modifient la base ou les jetons du compte de mesure
+SKIPPED_ROUTES = {
+    'api-seed-products': "écriture : régénère le catalogue",
+    'users:auth_register': "écriture : crée un compte à chaque requête",
+    'users:auth_logout': "écriture : révoque le jeton de rafraîchissement",
+    'users:change_password': "écriture : change le mot de passe du compte de mesure",
+}
+# Routes mesurées seulement si demandées avec --route
+OPTIONAL_ROUTES = {
+    'api-product-export': "flux complet du catalogue (--route api-product-export)",
+}
+
+# Métriques comparées d'une exécution à l'autre : (clé, libellé, sens de la régression)
+COMPARED_METRICS = (
+    ('p95_ms', 'p95', 'up'),
+    ('rps', 'req/s', 'down'),
+    ('mean_bytes', 'octets', 'up'),
+)
+
+class Command(BaseCommand):
+    help = (
+        "Mesure chaque route de products.api.urls et users.api.urls : latences p50/p95/p99 et débit "
+        "sous charge (gunicorn), requêtes SQL cache froid et chaud, taille des réponses. Les résultats "
+        "sont enregistrés en JSON et peuvent être comparés à ceux d'un autre commit (--compare) : "
+        "une régression au-delà du seuil fait échouer la commande."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help="Clients simultanés par route (défaut : 8)")
+        parser.add_argument('--duration', type=float, default=5,
+                            help="Durée de mesure par route, en secondes (défaut : 5)")
+        parser.add_argument('--warmup', type=float, default=1,
+                            help="Charge non mesurée avant chaque route, en secondes (défaut : 1)")
+        parser.add_argument('--workers', type=int, default=1, help="Workers gunicorn (défaut : 1)")
+        parser.add_argument('--threads', type=int, default=1, help="Threads par worker WSGI (défaut : 1)")
+        parser.add_argument('--asgi', action='store_true',
+                            help="Serveur ASGI uvicorn avec les vues asynchrones du catalogue")
+        parser.add_argument('--route', action='append',
+                            help="Limite la mesure à cette route (nom d'URL, répétable)")
+        parser.add_argument('--output', help="Fichier JSON des résultats (défaut : benchmark-<commit>.json)")
+        parser.add_argument('--results', help="Compare un fichier de résultats existant au lieu de mesurer")
+        parser.add_argument('--compare', help="Résultats de référence (JSON) auxquels comparer")
+        parser.add_argument('--threshold', type=float, default=10,
+                            help="Écart toléré sur p95, req/s et taille des réponses, en %% (défaut : 10)")
+        parser.add_argument('--min-delta-ms', type=float, default=2,
+                            help="Écart de p95 ignoré en dessous de cette valeur, en ms (défaut : 2)")
+
+    def handle(self, *args, **options):
+        if options['results']:
+            with open(options['results']) as results_file:
+                results = json.load(results_file)
+        else:
+            results = self.run_benchmark(options)
+            output = options['output'] or f"benchmark-{(results['meta']['commit'] or 'local')[:12]}.json"
+            with open(output, 'w') as output_file:
+                json.dump(results, output_file, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Résultats enregistrés dans {output}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = self.compare(baseline, results, options)
+            if regressions:
+                raise CommandError("Régressions par rapport à la référence :\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"Aucune régression au-delà de {options['threshold']:g} %"))
+
+    def run_benchmark(self, options):
+        routes = dict(api_routes())
+        selected = set(options['route'] or routes)
+        unknown = selected - routes.keys()
+        if unknown:
+            raise CommandError(f"Routes inconnues : {', '.join(sorted(unknown))}")
+
+        user, password = self.benchmark_user()
+        try:
+            scenarios = self.scenarios(user, password)
+            uncovered = sorted(routes.keys() - scenarios.keys() - SKIPPED_ROUTES.keys())
+            for name in uncovered:
+                self.stdout.write(self.style.WARNING(f"Route sans scénario de mesure : {name} ({routes[name]})"))
+
+            measured = {}
+            for name in routes:
+                if name not in selected:
+                    continue
+                if name in SKIPPED_ROUTES or name not in scenarios:
+                    continue
+                if name in OPTIONAL_ROUTES and not options['route']:
+                    continue
+                measured[name] = scenarios[name]
+
+            # Requêtes SQL mesurées dans ce processus, avant la charge, sur un cache privé
+            with override_settings(CACHES=QUERY_COUNT_CACHES):
+                query_counts = {name: self.count_queries(request) for name, request in measured.items()}
+
+            env = {'CATALOG_ASYNC_VIEWS': '1' if options['asgi'] else '0'}
+            if options['asgi']:
+                server = GunicornServer(env, workers=options['workers'], app=ASGI_APP, worker_class=ASGI_WORKER_CLASS)
+            else:
+                server = GunicornServer(env, workers=options['workers'], threads=options['threads'], app=WSGI_APP)
+
+            self.stdout.write(
+                f"{len(measured)} routes, {options['concurrency']} clients, {options['duration']:g} s par route, "
+                f"{'ASGI' if options['asgi'] else 'WSGI'} {options['workers']} worker(s)"
+            )
+            self.stdout.write(
+                f"{'route':<28} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'octets':>9} {'SQL froid/chaud':>16}"
+            )
+            results = {}
+            with server as base_url:
+                for name, request in measured.items():
+                    results[name] = self.measure(base_url, name, request, query_counts[name], options)
+        finally:
+            # Les jetons JWT émis restent signés valides jusqu'à expiration :
+            # sans compte, JWTAuthentication les refuse
+            user.delete()
+
+        return {
+            'meta': self.metadata(options),
+            'routes': results,
+            'skipped': {
+                **{name: reason for name, reason in SKIPPED_ROUTES.items() if name in routes},
+                **{name: reason for name, reason in OPTIONAL_ROUTES.items() if name not in results},
+            },
+            'uncovered': uncovered,
+        }
+
+    def benchmark_user(self):
+        """Compte administrateur de mesure, recréé pour cette exécution seulement"""
+        User = get_user_model()
+        # Reste d'une exécution interrompue
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        password = secrets.token_urlsafe(24)
+        user = User.objects.create_user(
+            BENCHMARK_EMAIL, password, username=BENCHMARK_EMAIL,
+            first_name='Benchmark', last_name='Benchmark', is_staff=True,
+        )
+        return user, password
+
+    def scenarios(self, user, password):
+        """Requête représentative de chaque route, avec des slugs réels de la base"""
+        product = Product.objects.filter(PUBLIC_PRODUCTS).order_by('id').first()
+        category = Category.objects.filter(is_published=True, products__in=Product.objects.filter(PUBLIC_PRODUCTS)).order_by('id').first()
+        subcategory = SubCategory.objects.filter(is_published=True, products__in=Product.objects.filter(PUBLIC_PRODUCTS)).order_by('id').first()
+        if not (product and category and subcategory):
+            raise CommandError("La base doit contenir au moins une catégorie, une sous-catégorie et un produit publiés")
+        batch = ','.join(Product.objects.filter(PUBLIC_PRODUCTS).order_by('id').values_list('slug', flat=True)[:20])
+        word = product.name.split()[0]
+
+        refresh = RefreshToken.for_user(user)
+        auth = {'Authorization': f'Bearer {refresh.access_token}'}
+        return {
+            'api-category-list': LoadRequest(reverse('api-category-list')),
+            'api-category-detail': LoadRequest(reverse('api-category-detail', args=[category.slug])),
+            'api-category-products': LoadRequest(reverse('api-category-products', args=[category.slug])),
+            'api-subcategory-list': LoadRequest(reverse('api-subcategory-list')),
+            'api-subcategory-by-category': LoadRequest(reverse('api-subcategory-by-category') + f'?category={category.slug}'),
+            'api-subcategory-detail': LoadRequest(reverse('api-subcategory-detail', args=[subcategory.slug])),
+            'api-subcategory-products': LoadRequest(reverse('api-subcategory-products', args=[subcategory.slug])),
+            'api-product-list': LoadRequest(reverse('api-product-list')),
+            'api-featured-products': LoadRequest(reverse('api-featured-products')),
+            'api-product-search': LoadRequest(reverse('api-product-search') + f'?q={word}'),
+            'api-product-autocomplete': LoadRequest(reverse('api-product-autocomplete') + f'?q={word[:3]}'),
+            'api-product-batch': LoadRequest(reverse('api-product-batch') + f'?slugs={batch}'),
+            'api-product-export': LoadRequest(reverse('api-product-export'), headers=auth),
+            'api-product-detail': LoadRequest(reverse('api-product-detail', args=[product.slug])),
+            'api-db-pool-stats': LoadRequest(reverse('api-db-pool-stats'), headers=auth),
+            'users:token_obtain_pair': LoadRequest(
+                reverse('users:token_obtain_pair'), 'POST', {'email': user.email, 'password': password}
+            ),
+            # ROTATE_REFRESH_TOKENS est désactivé : le même jeton sert à toutes les requêtes
+            'users:token_refresh': LoadRequest(reverse('users:token_refresh'), 'POST', {'refresh': str(refresh)}),
+            'users:user_profile': LoadRequest(reverse('users:user_profile'), headers=auth),
+        }
+
+    def count_queries(self, request):
+        """Requêtes SQL (toutes bases confondues) cache froid, puis pour la même requête cache chaud"""
+        # Une route en erreur est notée comme telle sans interrompre la mesure des autres
+        client = Client(raise_request_exception=False)
+        headers = {f"HTTP_{key.upper().replace('-', '_')}": value
+                   for key, value in request.headers.items() if key != 'Content-Type'}
+
+        def send():
+            with ExitStack() as stack:
+                contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                response = client.generic(
+                    request.method, request.path, request.body or b'',
+                    content_type=request.headers.get('Content-Type', 'application/octet-stream'), **headers,
+                )
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            return response.status_code, sum(len(context.captured_queries) for context in contexts)
+
+        cache.clear()
+        status, cold = send()
+        _, warm = send()
+        return {'status': status, 'cold': cold, 'warm': warm}
+
+    def measure(self, base_url, name, request, queries, options):
+        if options['warmup'] > 0:
+            run_requests(base_url, [request], options['concurrency'], options['warmup'])
+        result = run_requests(base_url, [request], options['concurrency'], options['duration'])
+        latencies = result['latencies']
+        requests = len(latencies)
+        row = {
+            'method': request.method,
+            'path': request.path,
+            'status': queries['status'],
+            'requests': requests,
+            'errors': result['errors'],
+            'rps': round(result['rps'], 1),
+            'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+            'mean_bytes': round(result['bytes'] / requests) if requests else None,
+            'queries_cold': queries['cold'],
+            'queries_warm': queries['warm'],
+        }
+        if not requests:
+            self.stdout.write(self.style.ERROR(f"{name:<28} aucune réponse valide ({result['errors']} erreurs)"))
+            return row
+        line = (f"{name:<28} {row['rps']:8.1f} {row['p50_ms']:6.1f}ms {row['p95_ms']:6.1f}ms {row['p99_ms']:6.1f}ms "
+                f"{row['mean_bytes']:9d} {row['queries_cold']:>8}/{row['queries_warm']:<7}")
+        if result['errors'] or row['status'] >= 400:
+            self.stdout.write(self.style.ERROR(f"{line} {result['errors']} erreurs, HTTP {row['status']}"))
+        else:
+            self.stdout.write(line)
+        return row
+
+    def metadata(self, options):
+        def git(*args):
+            try:
+                return subprocess.run(
+                    ['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+                ).stdout.strip()
+            except (OSError, subprocess.CalledProcessError):
+                return None
+
+        commit = git('rev-parse', 'HEAD')
+        return {
+            'commit': commit,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no')) if commit else None,
+            'date': timezone.now().isoformat(timespec='seconds'),
+            'server': 'asgi' if options['asgi'] else 'wsgi',
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'products': Product.objects.count(),
+            'published_products': Product.objects.filter(PUBLIC_PRODUCTS).count(),
+        }
+
+    def compare(self, baseline, current, options):
+        """Écarts par route ; renvoie les régressions au-delà du seuil"""
+        threshold = options['threshold'] / 100
+        base_meta, meta = baseline['meta'], current['meta']
+        self.stdout.write(
+            f"Référence {(base_meta['commit'] or '?')[:12]} ({base_meta['date']}) → "
+            f"{(meta['commit'] or '?')[:12]}{' (modifié)' if meta['dirty'] else ''} ({meta['date']})"
+        )
+        for key in ('server', 'workers', 'threads', 'concurrency', 'products'):
+            if base_meta.get(key) != meta.get(key):
+                self.stdout.write(self.style.WARNING(
+                    f"Conditions différentes : {key} {base_meta.get(key)} → {meta.get(key)}, comparaison indicative"
+                ))
+
+        regressions = []
+        for name, before in baseline['routes'].items():
+            after = current['routes'].get(name)
+            if after is None:
+                self.stdout.write(self.style.WARNING(f"{name} : absente des résultats comparés"))
+                continue
+            problems, changes = [], []
+            if after['errors'] and not before['errors']:
+                problems.append(f"{after['errors']} erreurs")
+            if after['status'] != before['status']:
+                problems.append(f"HTTP {before['status']} → {after['status']}")
+            for key in ('queries_cold', 'queries_warm'):
+                if after[key] > before[key]:
+                    problems.append(f"{key} {before[key]} → {after[key]}")
+            for key, label, direction in COMPARED_METRICS:
+                if not before.get(key) or after.get(key) is None:
+                    continue
+                change = after[key] / before[key] - 1
+                changes.append(f"{label} {change:+.1%}")
+                worse = change > threshold if direction == 'up' else change < -threshold
+                if key == 'p95_ms' and after[key] - before[key] < options['min_delta_ms']:
+                    worse = False
+                if worse:
+                    problems.append(f"{label} {before[key]} → {after[key]} ({change:+.1%})")
+            if problems:
+                regressions.append(f"{name} : {', '.join(problems)}")
+                self.stdout.write(self.style.ERROR(f"✗ {name} : {', '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name} : {', '.join(changes)}"))
+        for name in current['routes'].keys() - baseline['routes'].keys():
+            self.stdout.write(f"{name} : nouvelle route, sans référence")
+        return regressions
@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Product
+from products.rows import ProductRowSerializer, render_json
+from products.serializers import ProductSerializer
+
+class Command(BaseCommand):
+    help = "Compare ProductSerializer et le chemin rapide ProductRowSerializer (requêtes, sérialisation et rendu JSON)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 10000],
+                            help="Nombres de produits à sérialiser (défaut : 100 1000 10000)")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Nombre de mesures par taille ; la médiane est retenue (défaut : 5)")
+
+    def handle(self, *args, **options):
+        products = Product.objects.filter(available=True, is_published=True).order_by('-created_at', '-id')
+        available = products.count()
+        if not available:
+            raise CommandError("Aucun produit publié : peuplez d'abord la base")
+
+        for size in options['sizes']:
+            if size > available:
+                self.stdout.write(self.style.WARNING(
+                    f"{size} lignes demandées, seulement {available} produits publiés : taille ignorée"
+                ))
+                continue
+
+            queryset = products[:size]
+            drf_output, drf_queries, drf_times = self.measure(lambda: self.render_drf(queryset), options['repeat'])
+            fast_output, fast_queries, fast_times = self.measure(lambda: self.render_fast(queryset), options['repeat'])
+
+            if drf_output != fast_output:
+                raise CommandError(f"{size} lignes : le JSON du chemin rapide diffère de ProductSerializer")
+
+            drf_ms = statistics.median(drf_times) * 1000
+            fast_ms = statistics.median(fast_times) * 1000
+            self.stdout.write(f"\n{size} produits ({len(drf_output)} octets, JSON identique)")
+            self.stdout.write(f"  ProductSerializer    : {drf_ms:9.1f} ms  {size / drf_ms * 1000:10.0f} lignes/s  {drf_queries} requêtes")
+            self.stdout.write(f"  ProductRowSerializer : {fast_ms:9.1f} ms  {size / fast_ms * 1000:10.0f} lignes/s  {fast_queries} requêtes")
+            self.stdout.write(self.style.SUCCESS(f"  Gain : x{drf_ms / fast_ms:.1f}"))
+
+    def measure(self, render, repeat):
+        times = []
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                output = render()
+                times.append(time.perf_counter() - start)
+        return output, len(context.captured_queries), times
+
+    def render_drf(self, queryset):
+        queryset = ProductSerializer.setup_eager_loading(queryset)
+        return JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+
+    def render_fast(self, queryset):
+        serializer = ProductRowSerializer()
+        return render_json(serializer.to_representation(serializer.get_queryset(queryset)))
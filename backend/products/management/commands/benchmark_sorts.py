@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.cache import bump_catalog_version
+from products.explain import PRODUCT_TABLE, explain, find_page_query, scan_plan
+from products.models import Product
+from products.sorting import PRODUCT_SORTS
+
+class Command(BaseCommand):
+    help = "Mesure chaque tri de /api/products/ (première page et page profonde) et l'index utilisé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=50,
+                            help="Nombre de pages suivies pour la mesure en profondeur (défaut : 50)")
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Nombre de mesures par page ; la médiane est retenue (défaut : 5)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Ce banc d'essai nécessite PostgreSQL")
+
+        total = Product.objects.filter(available=True, is_published=True).count()
+        if not total:
+            raise CommandError("Aucun produit publié : peuplez d'abord la base")
+        if total < 10000:
+            self.stdout.write(self.style.WARNING(
+                f"{total} produits publiés seulement : les plans ne sont pas représentatifs d'un gros catalogue"
+            ))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{PRODUCT_TABLE}"')
+
+        client = Client()
+        url = reverse('api-product-list')
+        failures = []
+        self.stdout.write(f"{total} produits publiés, pages de {options['page_size']}\n")
+        for sort in PRODUCT_SORTS:
+            params = {'sort_by': sort, 'page_size': options['page_size']}
+            first_url = client.get(url, params).wsgi_request.get_full_path()
+            deep_url = self.follow(client, first_url, options['depth'])
+
+            for label, page_url in (('page 1', first_url), (f"page {options['depth'] + 1}", deep_url)):
+                if page_url is None:
+                    continue
+                elapsed, sql = self.measure(client, page_url, options['repeat'])
+                plan = explain(sql, analyze=True)
+                indexes, problems = scan_plan(plan['Plan'])
+                used = ', '.join(sorted(indexes)) or 'aucun index'
+                line = (f"{sort:<11} {label:<9} {elapsed:8.1f} ms  "
+                        f"SQL {plan['Execution Time']:7.2f} ms  {used}")
+                if problems:
+                    failures.append(f"{sort} ({label}) : {', '.join(problems)}")
+                    self.stdout.write(self.style.ERROR(f"{line}  {', '.join(problems)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+
+        if failures:
+            raise CommandError("Tris non couverts par un index :\n" + "\n".join(failures))
+
+    def follow(self, client, url, pages):
+        """URL de la page atteinte après avoir suivi `pages` curseurs, None si le catalogue est trop court"""
+        for _ in range(pages):
+            url = client.get(url).json()['next']
+            if url is None:
+                return None
+        return url
+
+    def measure(self, client, url, repeat):
+        """Médiane du temps de réponse (cache du catalogue invalidé) et SQL de la page"""
+        times = []
+        sql = None
+        for _ in range(max(repeat, 1)):
+            bump_catalog_version()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url)
+                times.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"{url} : statut HTTP {response.status_code}")
+            sql = find_page_query(context.captured_queries)
+        return statistics.median(times) * 1000, sql
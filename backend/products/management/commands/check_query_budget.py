@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.cache import bump_catalog_version
+from products.models import Category, SubCategory, Product
+
+# Nombre maximal de requêtes SQL autorisées par endpoint, quel que soit le
+# nombre de lignes renvoyées. Mesuré cache vide ; la première requête des
+# endpoints conditionnels est le calcul de l'ETag.
+QUERY_BUDGETS = {
+    'api-category-list': 3,
+    'api-category-detail': 3,
+    'api-category-products': 4,
+    'api-subcategory-list': 2,
+    'api-subcategory-by-category': 3,
+    'api-subcategory-detail': 2,
+    'api-subcategory-products': 4,
+    'api-product-list': 3,
+    'api-featured-products': 3,
+    'api-product-search': 2,
+    'api-product-detail': 4,
+    'api-product-batch': 2,
+}
+
+class Command(BaseCommand):
+    help = "Vérifie que chaque endpoint du catalogue reste dans son budget de requêtes SQL"
+
+    def handle(self, *args, **options):
+        category = Category.objects.filter(is_published=True).first()
+        subcategory = SubCategory.objects.filter(is_published=True).first()
+        product = Product.objects.filter(available=True, is_published=True).first()
+        if not (category and subcategory and product):
+            raise CommandError("La base doit contenir au moins une catégorie, une sous-catégorie et un produit publiés")
+
+        requests = {
+            'api-category-list': (reverse('api-category-list'), {}),
+            'api-category-detail': (reverse('api-category-detail', args=[category.slug]), {}),
+            'api-category-products': (reverse('api-category-products', args=[category.slug]), {}),
+            'api-subcategory-list': (reverse('api-subcategory-list'), {}),
+            'api-subcategory-by-category': (reverse('api-subcategory-by-category'), {'category': category.slug}),
+            'api-subcategory-detail': (reverse('api-subcategory-detail', args=[subcategory.slug]), {}),
+            'api-subcategory-products': (reverse('api-subcategory-products', args=[subcategory.slug]), {}),
+            'api-product-list': (reverse('api-product-list'), {'page_size': 100}),
+            'api-featured-products': (reverse('api-featured-products'), {}),
+            'api-product-search': (reverse('api-product-search'), {'q': product.name[:3]}),
+            'api-product-detail': (reverse('api-product-detail', args=[product.slug]), {}),
+            'api-product-batch': (reverse('api-product-batch'), {
+                'slugs': ','.join(Product.objects.filter(available=True, is_published=True).values_list('slug', flat=True)[:20])
+            }),
+        }
+
+        client = Client()
+        failures = []
+        for name, budget in QUERY_BUDGETS.items():
+            url, params = requests[name]
+            bump_catalog_version()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, params)
+            count = len(context.captured_queries)
+
+            if response.status_code != 200:
+                failures.append(f"{name}: statut HTTP {response.status_code}")
+                self.stdout.write(self.style.ERROR(f"✗ {name} ({url}) : HTTP {response.status_code}"))
+            elif count > budget:
+                failures.append(f"{name}: {count} requêtes (budget {budget})")
+                self.stdout.write(self.style.ERROR(f"✗ {name} ({url}) : {count} requêtes / budget {budget}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name} ({url}) : {count} requêtes / budget {budget}"))
+
+        if failures:
+            raise CommandError("Budget de requêtes dépassé :\n" + "\n".join(failures))
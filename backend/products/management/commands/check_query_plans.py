@@ -0,0 +1,85 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.cache import bump_catalog_version
+from products.explain import PRODUCT_TABLE, explain, find_page_query, scan_plan
+from products.models import Category, SubCategory, Product
+
+# Index partiels acceptables pour la requête de page de chaque endpoint, le
+# plus spécifique en premier. Quand une catégorie regroupe une grosse part du
+# catalogue, parcourir l'index général dans l'ordre et filtrer est aussi bon.
+EXPECTED_INDEXES = {
+    'api-product-list': ('product_public_recent_idx',),
+    'api-category-products': ('product_category_recent_idx', 'product_public_recent_idx'),
+    'api-subcategory-products': ('product_subcat_recent_idx', 'product_public_recent_idx'),
+    'api-featured-products': ('product_featured_recent_idx', 'product_public_recent_idx'),
+}
+
+class Command(BaseCommand):
+    help = "Vérifie avec EXPLAIN que les listes du catalogue utilisent leurs index partiels (catalogue volumineux requis)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-products', type=int, default=10000,
+                            help="Taille minimale du catalogue publié pour que les plans soient représentatifs (défaut : 10000)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Cette vérification nécessite PostgreSQL")
+
+        products = Product.objects.filter(available=True, is_published=True)
+        total = products.count()
+        if total < options['min_products']:
+            raise CommandError(
+                f"{total} produits publiés : au moins {options['min_products']} sont nécessaires, "
+                "sur un petit catalogue le planificateur préfère à juste titre un parcours séquentiel"
+            )
+
+        # Les plus grosses catégorie et sous-catégorie : le cas le plus défavorable
+        category = Category.objects.annotate(n=Count('products')).order_by('-n').first()
+        subcategory = SubCategory.objects.annotate(n=Count('products')).order_by('-n').first()
+        urls = {
+            'api-product-list': reverse('api-product-list'),
+            'api-category-products': reverse('api-category-products', args=[category.slug]),
+            'api-subcategory-products': reverse('api-subcategory-products', args=[subcategory.slug]),
+            'api-featured-products': reverse('api-featured-products'),
+        }
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{PRODUCT_TABLE}"')
+
+        client = Client()
+        failures = []
+        for name, expected in EXPECTED_INDEXES.items():
+            bump_catalog_version()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(urls[name])
+            if response.status_code != 200:
+                failures.append(f"{name}: statut HTTP {response.status_code}")
+                continue
+
+            sql = find_page_query(context.captured_queries)
+            if sql is None:
+                failures.append(f"{name}: requête de page introuvable")
+                continue
+
+            plan = explain(sql)['Plan']
+            indexes, problems = scan_plan(plan)
+            index = next((index for index in expected if index in indexes), None)
+            if index and not problems:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name} : parcours ordonné de l'index {index}"))
+            else:
+                used = ', '.join(sorted(indexes)) or 'aucun index'
+                detail = f"attendu {' ou '.join(expected)}, obtenu {used}" + ''.join(f" + {p}" for p in problems)
+                failures.append(f"{name}: {detail}")
+                self.stdout.write(self.style.ERROR(f"✗ {name} : {detail}"))
+                if options['verbosity'] > 1:
+                    self.stdout.write(json.dumps(plan, indent=2))
+
+        if failures:
+            raise CommandError("Plans d'exécution inattendus :\n" + "\n".join(failures))
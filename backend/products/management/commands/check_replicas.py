@@ -0,0 +1,63 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jaelleshop.replicas import PIN_COOKIE, PRIMARY, healthy_replicas, measure_lag, read_replicas
+
+class Command(BaseCommand):
+    help = "Affiche le retard de chaque réplica et vérifie le routage des lectures du catalogue"
+
+    def handle(self, *args, **options):
+        replicas = read_replicas()
+        if not replicas:
+            raise CommandError("Aucun réplica configuré (variable POSTGRES_REPLICAS)")
+
+        for alias in replicas:
+            lag = measure_lag(alias)
+            if lag is None:
+                self.stdout.write(self.style.ERROR(f"✗ {alias} : injoignable"))
+            elif lag > settings.REPLICA_MAX_LAG_SECONDS:
+                self.stdout.write(self.style.WARNING(
+                    f"✗ {alias} : retard {lag:.2f} s > {settings.REPLICA_MAX_LAG_SECONDS} s, écarté"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {alias} : retard {lag:.2f} s"))
+
+        url = reverse('api-product-list')
+        expected = set(healthy_replicas()) or {PRIMARY}
+        failures = []
+
+        client = Client()
+        used = self.databases_used(client, url)
+        self.report("Lecture du catalogue", used, expected, failures)
+
+        client.cookies[PIN_COOKIE] = '1'
+        used = self.databases_used(client, url)
+        self.report("Lecture juste après une écriture", used, {PRIMARY}, failures)
+
+        if failures:
+            raise CommandError("Routage inattendu :\n" + "\n".join(failures))
+
+    def databases_used(self, client, url):
+        with ExitStack() as stack:
+            contexts = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in [PRIMARY, *read_replicas()]
+            }
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url} : statut HTTP {response.status_code}")
+        return {alias for alias, context in contexts.items() if context.captured_queries}
+
+    def report(self, label, used, expected, failures):
+        names = ', '.join(sorted(used)) or 'aucune requête'
+        if used and used <= expected:
+            self.stdout.write(self.style.SUCCESS(f"✓ {label} : {names}"))
+        else:
+            failures.append(f"{label} : {names} (attendu : {', '.join(sorted(expected))})")
+            self.stdout.write(self.style.ERROR(f"✗ {label} : {names}"))
@@ -0,0 +1,49 @@
+import gzip
+import resource
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, CatalogExport
+
+class Command(BaseCommand):
+    help = (
+        "Exporte le catalogue publié en NDJSON ou en CSV (même flux que /api/products/export/) "
+        "et affiche la mémoire maximale utilisée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help="Fichier de sortie (défaut : sortie standard)")
+        parser.add_argument('--gzip', action='store_true', help="Compresse la sortie en gzip")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help=f"Produits lus par paquet (défaut : {EXPORT_CHUNK_SIZE})")
+
+    def handle(self, *args, **options):
+        export = CatalogExport(options['format'], chunk_size=options['chunk_size'])
+        if options['output']:
+            target = open(options['output'], 'wb')
+        else:
+            target = sys.stdout.buffer
+        stream = gzip.GzipFile(fileobj=target, mode='wb') if options['gzip'] else target
+
+        start = time.perf_counter()
+        size = 0
+        try:
+            for chunk in export:
+                stream.write(chunk)
+                size += len(chunk)
+        finally:
+            if stream is not target:
+                stream.close()
+            if options['output']:
+                target.close()
+        elapsed = time.perf_counter() - start
+
+        # ru_maxrss est en kilo-octets sous Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stderr.write(
+            f"{export.rows} produits, {size / 1024 / 1024:.1f} Mo non compressés en {elapsed:.1f} s, "
+            f"mémoire maximale {peak:.0f} Mo"
+        )
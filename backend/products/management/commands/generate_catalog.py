@@ -0,0 +1,458 @@
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from orders.models import Order, OrderItem
+from products.cache import bump_catalog_version
+from products.models import (
+    Category,
+    SubCategory,
+    Product,
+    ProductImage,
+    refresh_product_counters,
+    refresh_search_vectors,
+)
+from products.sitemaps import chunk_of, invalidate_product_chunks
+from users.models import User, Address
+
+# Marqueurs des données générées, pour les retrouver (--reset) sans toucher aux autres
+SYNTHETIC_SLUG_PREFIX = 'synth-'
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.invalid'
+SYNTHETIC_ORDER_PREFIX = 'SYN-'
+
+# Catégorie : (types de produits, qui donnent les sous-catégories ; matériaux)
+VOCABULARY = {
+    'Vêtements': (['T-shirt', 'Chemise', 'Pantalon', 'Veste', 'Pull', 'Sweat', 'Jean', 'Polo', 'Robe', 'Jupe'],
+                  ['Coton', 'Lin', 'Laine', 'Polyester', 'Soie', 'Denim']),
+    'Chaussures': (['Sneakers', 'Bottes', 'Mocassins', 'Sandales', 'Baskets', 'Escarpins', 'Derbies'],
+                   ['Cuir', 'Toile', 'Synthétique', 'Daim', 'Textile']),
+    'Accessoires': (['Ceinture', 'Écharpe', 'Gants', 'Bracelet', 'Collier', 'Portefeuille', 'Lunettes'],
+                    ['Cuir', 'Tissu', 'Métal', 'Argent', 'Or']),
+    'Montres': (['Montre analogique', 'Montre digitale', 'Smartwatch', 'Montre sport', 'Chronographe'],
+                ['Acier', 'Cuir', 'Silicone', 'Titane', 'Céramique']),
+    'Casquettes/Sacs': (['Casquette', 'Sac à dos', 'Sac bandoulière', 'Sacoche', 'Sac de sport', 'Bob'],
+                        ['Coton', 'Polyester', 'Cuir', 'Toile', 'Nylon']),
+}
+BRANDS = ['EVIMERIA', 'Nike', 'Adidas', 'Zara', 'Puma', 'Fossil', 'Casio', 'Eastpak', 'Converse', 'Uniqlo']
+COLORS = ['Noir', 'Blanc', 'Bleu', 'Rouge', 'Gris', 'Beige', 'Marine', 'Vert', 'Marron', 'Or']
+PHRASES = [
+    "Coupe moderne et finitions soignées.",
+    "Idéal pour un usage quotidien comme pour les grandes occasions.",
+    "Confortable, léger et résistant.",
+    "Une pièce intemporelle à associer à toutes vos tenues.",
+    "Fabrication durable, entretien facile.",
+]
+CITIES = ['Paris', 'Lyon', 'Marseille', 'Bordeaux', 'Lille', 'Nantes', 'Toulouse', 'Bruxelles', 'Genève']
+
+ORDER_STATUSES = [('delivered', 50), ('shipped', 15), ('processing', 10), ('pending', 15), ('cancelled', 10)]
+PAYMENT_METHODS = ['credit_card', 'paypal', 'bank_transfer']
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Désactive auto_now/auto_now_add le temps d'un bulk_create : les dates générées sont conservées"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+def reserve_ids(model, count):
+    """
+    Réserve une plage contiguë d'identifiants : les lignes sont écrites avec
+    leur clé primaire, ce qui permet de les relier entre elles sans relecture.
+    """
+    table = model._meta.db_table
+    column = model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Aucune insertion concurrente jusqu'à la fin de la transaction
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(table)} IN EXCLUSIVE MODE')
+        cursor.execute(f'SELECT COALESCE(MAX({connection.ops.quote_name(column)}), 0) FROM {connection.ops.quote_name(table)}')
+        start = cursor.fetchone()[0] + 1
+        if connection.vendor == 'postgresql' and count:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), %s)", [table, column, start + count - 1])
+    return start
+
+class TableWriter:
+    """
+    Écrit des tuples dans la table d'un modèle, par COPY (PostgreSQL) ou par
+    bulk_create. Les champs non fournis prennent leur valeur par défaut.
+    """
+
+    def __init__(self, model, fields, method, batch_size):
+        self.model = model
+        self.fields = list(fields)
+        self.method = method
+        self.batch_size = batch_size
+        others = [field for field in model._meta.concrete_fields if field.attname not in self.fields]
+        self.all_fields = self.fields + [field.attname for field in others]
+        self.defaults = tuple(field.get_default() for field in others)
+        self.rows = 0
+
+    def write(self, rows):
+        rows = (row + self.defaults for row in rows)
+        if self.method == 'copy':
+            self.copy(rows)
+        else:
+            self.bulk_create(rows)
+
+    def copy(self, rows):
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(self.model._meta.get_field(name).column) for name in self.all_fields)
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(f'COPY {quote(self.model._meta.db_table)} ({columns}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    self.rows += 1
+
+    def bulk_create(self, rows):
+        # QuerySet de base : ProductImageQuerySet.bulk_create recalculerait le résumé
+        # des images, déjà écrit avec les produits
+        queryset = QuerySet(model=self.model)
+        with explicit_timestamps(self.model):
+            while batch := list(islice(rows, self.batch_size)):
+                queryset.bulk_create([self.model(**dict(zip(self.all_fields, row))) for row in batch])
+                self.rows += len(batch)
+
+class Command(BaseCommand):
+    help = (
+        "Génère un catalogue synthétique reproductible (catégories, sous-catégories, produits, images, "
+        "clients et commandes) pour les tests de charge et de passage à l'échelle"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help="Nombre de produits (défaut : 10000)")
+        parser.add_argument('--seed', type=int, default=42, help="Graine : même graine, même catalogue (défaut : 42)")
+        parser.add_argument('--categories', type=int, default=10, help="Nombre de catégories (défaut : 10)")
+        parser.add_argument('--subcategories', type=int, default=6,
+                            help="Sous-catégories par catégorie (défaut : 6)")
+        parser.add_argument('--category-skew', type=float, default=1.0,
+                            help="Exposant de Zipf de la répartition des produits entre catégories (0 : uniforme, défaut : 1)")
+        parser.add_argument('--price-distribution', choices=['lognormal', 'uniform'], default='lognormal')
+        parser.add_argument('--price-median', type=float, default=45.0, help="Prix médian, loi log-normale (défaut : 45)")
+        parser.add_argument('--price-sigma', type=float, default=0.8, help="Dispersion, loi log-normale (défaut : 0.8)")
+        parser.add_argument('--price-min', type=float, default=5.0)
+        parser.add_argument('--price-max', type=float, default=2000.0)
+        parser.add_argument('--images', type=int, default=3, help="Images au plus par produit (défaut : 3)")
+        parser.add_argument('--published-ratio', type=float, default=0.9)
+        parser.add_argument('--available-ratio', type=float, default=0.95)
+        parser.add_argument('--featured-ratio', type=float, default=0.01)
+        parser.add_argument('--orders', type=int, default=None,
+                            help="Nombre de commandes (défaut : un dixième du nombre de produits)")
+        parser.add_argument('--users', type=int, default=None,
+                            help="Nombre de clients (défaut : un cinquième du nombre de commandes)")
+        parser.add_argument('--start-date', default='2024-01-01',
+                            help="Date de création la plus ancienne, AAAA-MM-JJ (défaut : 2024-01-01)")
+        parser.add_argument('--days', type=int, default=730, help="Période de création en jours (défaut : 730)")
+        parser.add_argument('--image-url', default='https://res.cloudinary.com/demo/image/upload/v1/synthetic/{category}/{product}-{index}.jpg',
+                            help="Modèle d'URL des images ({category}, {product}, {index})")
+        parser.add_argument('--method', choices=['copy', 'bulk'], default=None,
+                            help="COPY (défaut sous PostgreSQL) ou bulk_create")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Lignes par bulk_create (défaut : 5000)")
+        parser.add_argument('--skip-search-vectors', action='store_true',
+                            help="Ne calcule pas les vecteurs de recherche (plus rapide, recherche inopérante)")
+        parser.add_argument('--reset', action='store_true', help="Supprime d'abord les données synthétiques existantes")
+
+    def handle(self, *args, **options):
+        method = options['method'] or ('copy' if connection.vendor == 'postgresql' else 'bulk')
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError("COPY nécessite PostgreSQL : utilisez --method bulk")
+        self.method = method
+        self.options = options
+        self.start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        self.span = options['days'] * 86400
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            if options['reset']:
+                self.step("Suppression des données synthétiques", self.reset)
+            if options['products'] > 0:
+                self.generate()
+        self.step("ANALYZE", self.analyze)
+        self.stdout.write(self.style.SUCCESS(f"Terminé en {time.perf_counter() - started:.1f} s"))
+
+    def step(self, label, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        detail = f" : {result}" if result is not None else ''
+        self.stdout.write(f"{label}{detail} ({time.perf_counter() - start:.1f} s)")
+        return result
+
+    def timestamp(self, rng):
+        return self.start_date + timedelta(seconds=rng.random() * self.span)
+
+    def writer(self, model, fields):
+        return TableWriter(model, fields, self.method, self.options['batch_size'])
+
+    def generate(self):
+        options = self.options
+        seed = options['seed']
+        self.product_count = options['products']
+        self.order_count = options['orders'] if options['orders'] is not None else self.product_count // 10
+        self.user_count = options['users'] if options['users'] is not None else max(1, self.order_count // 5)
+
+        self.step("Catégories et sous-catégories", self.generate_categories, random.Random(f'{seed}:categories'))
+        self.plan_products(seed)
+
+        self.product_start = reserve_ids(Product, self.product_count)
+        self.image_start = reserve_ids(ProductImage, sum(self.image_counts))
+        self.step("Clients", self.generate_users, seed)
+        # Première passe sur les commandes : ventes de chaque produit (sales_count)
+        # et nombre d'articles, avant l'écriture des produits
+        self.order_start = reserve_ids(Order, self.order_count)
+        self.sales = array('I', bytes(4 * self.product_count))
+        item_count = 0
+        for _, items in self.iter_orders(seed):
+            item_count += len(items)
+            for product_index, quantity, _, counted in items:
+                if counted:
+                    self.sales[product_index] += quantity
+        self.item_start = reserve_ids(OrderItem, item_count)
+        self.step("Produits", self.generate_products, random.Random(f'{seed}:products'))
+        self.step("Images", self.generate_images)
+        self.step("Commandes", self.generate_orders, seed)
+
+        product_range = (self.product_start, self.product_start + self.product_count - 1)
+        if not options['skip_search_vectors']:
+            self.step("Vecteurs de recherche", refresh_search_vectors, Product.objects.filter(pk__range=product_range))
+        self.step("Compteurs", refresh_product_counters, self.category_ids, self.subcategory_ids)
+        bump_catalog_version()
+        invalidate_product_chunks(range(chunk_of(product_range[0]), chunk_of(product_range[1]) + 1))
+
+    def generate_orders(self, seed):
+        # Un seul COPY à la fois par connexion : commandes puis articles, en rejouant les tirages
+        orders = self.writer(Order, [
+            'id', 'user_id', 'shipping_address_id', 'billing_address_id', 'order_number', 'status',
+            'payment_method', 'payment_status', 'total_price', 'created_at', 'updated_at',
+        ])
+        orders.write(order for order, _ in self.iter_orders(seed))
+
+        def item_rows():
+            pk = self.item_start
+            for order, items in self.iter_orders(seed):
+                for product_index, quantity, price, _ in items:
+                    yield pk, order[0], self.product_start + product_index, quantity, price
+                    pk += 1
+
+        items = self.writer(OrderItem, ['id', 'order_id', 'product_id', 'quantity', 'price'])
+        items.write(item_rows())
+        return f"{orders.rows} commandes, {items.rows} articles"
+
+    def reset(self):
+        """Suppression en SQL : par l'ORM, chaque produit déclencherait ses signaux"""
+        quote = connection.ops.quote_name
+        tables = {model: quote(model._meta.db_table) for model in (
+            Category, SubCategory, Product, ProductImage, Order, OrderItem, User, Address
+        )}
+        synthetic_products = f"SELECT id FROM {tables[Product]} WHERE slug LIKE %s"
+        synthetic_orders = f"SELECT id FROM {tables[Order]} WHERE order_number LIKE %s"
+        synthetic_users = f"SELECT id FROM {tables[User]} WHERE email LIKE %s"
+        slug, order, email = f'{SYNTHETIC_SLUG_PREFIX}%', f'{SYNTHETIC_ORDER_PREFIX}%', f'%@{SYNTHETIC_EMAIL_DOMAIN}'
+        statements = [
+            (f"DELETE FROM {tables[OrderItem]} WHERE order_id IN ({synthetic_orders}) OR product_id IN ({synthetic_products})",
+             [order, slug]),
+            (f"DELETE FROM {tables[Order]} WHERE order_number LIKE %s", [order]),
+            (f"DELETE FROM {tables[Address]} WHERE user_id IN ({synthetic_users})", [email]),
+            (f"DELETE FROM {tables[User]} WHERE email LIKE %s", [email]),
+            (f"DELETE FROM {tables[ProductImage]} WHERE product_id IN ({synthetic_products})", [slug]),
+            (f"DELETE FROM {tables[Product]} WHERE slug LIKE %s", [slug]),
+            (f"DELETE FROM {tables[SubCategory]} WHERE slug LIKE %s", [slug]),
+            (f"DELETE FROM {tables[Category]} WHERE slug LIKE %s", [slug]),
+        ]
+        deleted = 0
+        with connection.cursor() as cursor:
+            for sql, params in statements:
+                cursor.execute(sql, params)
+                deleted += cursor.rowcount
+        bump_catalog_version()
+        # Toutes les tranches de sitemap existantes peuvent avoir perdu des produits
+        max_id = Product.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        invalidate_product_chunks(range(chunk_of(max_id) + 1))
+        return f"{deleted} lignes"
+
+    def analyze(self):
+        """Statistiques du planificateur à jour pour les mesures qui suivent"""
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            for model in (Category, SubCategory, Product, ProductImage, Order, OrderItem, User, Address):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def generate_categories(self, rng):
+        options = self.options
+        names = list(VOCABULARY)
+        existing = Category.objects.filter(slug__startswith=SYNTHETIC_SLUG_PREFIX).count()
+        self.categories = []
+        for index in range(options['categories']):
+            number = existing + index
+            base = names[number % len(names)]
+            name = base if number < len(names) else f"{base} {number // len(names) + 1}"
+            category = Category.objects.create(
+                name=name, slug=f'{SYNTHETIC_SLUG_PREFIX}{number}', is_published=True,
+                description=f"{name} : sélection générée pour les tests de charge",
+                image=options['image_url'].format(category=number, product='category', index=0),
+            )
+            types, materials = VOCABULARY[base]
+            subcategories = []
+            for position in range(options['subcategories']):
+                kind = types[position % len(types)]
+                subcategory = SubCategory.objects.create(
+                    category=category, name=kind if position < len(types) else f"{kind} {position // len(types) + 1}",
+                    slug=f'{SYNTHETIC_SLUG_PREFIX}{number}-{position}', is_published=True,
+                )
+                subcategories.append((subcategory.pk, kind))
+            # Gamme de prix propre à chaque catégorie
+            self.categories.append((category.pk, number, types, materials, subcategories, rng.uniform(0.6, 1.8)))
+        self.category_ids = [category[0] for category in self.categories]
+        self.subcategory_ids = [pk for category in self.categories for pk, _ in category[4]]
+        return f"{len(self.category_ids)} + {len(self.subcategory_ids)}"
+
+    def plan_products(self, seed):
+        """Prix et nombre d'images, tirés à part : les commandes en ont besoin avant l'écriture des produits"""
+        options = self.options
+        price_rng = random.Random(f'{seed}:prices')
+        image_rng = random.Random(f'{seed}:images')
+        weights = [1 / (rank + 1) ** options['category_skew'] for rank in range(len(self.categories))]
+        self.category_weights = list(accumulate(weights))
+        category_rng = random.Random(f'{seed}:product-categories')
+        self.product_categories = array('H', category_rng.choices(
+            range(len(self.categories)), cum_weights=self.category_weights, k=self.product_count
+        ))
+
+        self.prices = array('d')
+        for index in range(self.product_count):
+            factor = self.categories[self.product_categories[index]][5]
+            if options['price_distribution'] == 'lognormal':
+                price = price_rng.lognormvariate(0, options['price_sigma']) * options['price_median'] * factor
+            else:
+                price = price_rng.uniform(options['price_min'], options['price_max'])
+            # Prix psychologiques : ,99
+            price = max(options['price_min'], min(options['price_max'], price))
+            self.prices.append(int(price) + 0.99)
+        self.image_counts = array('B', (image_rng.randint(1, max(1, options['images'])) for _ in range(self.product_count)))
+
+    def generate_users(self, seed):
+        rng = random.Random(f'{seed}:users')
+        self.user_start = reserve_ids(User, self.user_count)
+        self.address_start = reserve_ids(Address, self.user_count)
+        joined = [self.timestamp(rng) for _ in range(self.user_count)]
+        users = self.writer(User, [
+            'id', 'email', 'username', 'first_name', 'last_name', 'password',
+            'is_active', 'is_staff', 'is_superuser', 'date_joined',
+        ])
+        users.write(
+            (self.user_start + index, f'client{self.user_start + index}@{SYNTHETIC_EMAIL_DOMAIN}', None,
+             'Client', f'{index:07d}', '!', True, False, False, joined[index])
+            for index in range(self.user_count)
+        )
+        addresses = self.writer(Address, [
+            'id', 'user_id', 'address_type', 'street_address', 'city', 'state', 'postal_code', 'country', 'is_default',
+        ])
+        addresses.write(
+            (self.address_start + index, self.user_start + index, 'shipping', f'{rng.randint(1, 200)} rue de la Paix',
+             city, city, f'{rng.randint(10000, 99999)}', 'France', True)
+            for index, city in enumerate(rng.choice(CITIES) for _ in range(self.user_count))
+        )
+        return f"{users.rows} clients, {addresses.rows} adresses"
+
+    def generate_products(self, rng):
+        options = self.options
+        writer = self.writer(Product, [
+            'id', 'category_id', 'subcategory_id', 'name', 'slug', 'description', 'price', 'stock',
+            'available', 'featured', 'is_published', 'created_at', 'updated_at',
+            'main_image_url', 'image_count', 'sales_count',
+        ])
+
+        def rows():
+            for index in range(self.product_count):
+                pk = self.product_start + index
+                category_id, number, types, materials, subcategories, _ = self.categories[self.product_categories[index]]
+                if subcategories and rng.random() < 0.85:
+                    subcategory_id, kind = rng.choice(subcategories)
+                else:
+                    subcategory_id, kind = None, rng.choice(types)
+                brand, material, color = rng.choice(BRANDS), rng.choice(materials), rng.choice(COLORS)
+                created_at = self.timestamp(rng)
+                yield (
+                    pk, category_id, subcategory_id,
+                    f"{kind} {brand} {material} {color}",
+                    f'{SYNTHETIC_SLUG_PREFIX}{pk}',
+                    f"{kind} en {material.lower()} {color.lower()} de la marque {brand}. {rng.choice(PHRASES)}",
+                    Decimal(f'{self.prices[index]:.2f}'),
+                    0 if rng.random() < 0.1 else rng.randint(1, 50),
+                    rng.random() < options['available_ratio'],
+                    rng.random() < options['featured_ratio'],
+                    rng.random() < options['published_ratio'],
+                    created_at,
+                    created_at + timedelta(seconds=rng.random() * 30 * 86400),
+                    self.image_url(number, pk, 0),
+                    self.image_counts[index],
+                    self.sales[index],
+                )
+
+        writer.write(rows())
+        return f"{writer.rows} produits (ids {self.product_start} à {self.product_start + writer.rows - 1})"
+
+    def image_url(self, category_number, product_id, index):
+        return self.options['image_url'].format(category=category_number, product=product_id, index=index)
+
+    def generate_images(self):
+        writer = self.writer(ProductImage, ['id', 'product_id', 'image', 'is_main', 'created_at'])
+        created_at = self.start_date
+
+        def rows():
+            pk = self.image_start
+            for index, count in enumerate(self.image_counts):
+                product_id = self.product_start + index
+                number = self.categories[self.product_categories[index]][1]
+                for position in range(count):
+                    yield pk, product_id, self.image_url(number, product_id, position), position == 0, created_at
+                    pk += 1
+
+        writer.write(rows())
+        return f"{writer.rows} images"
+
+    def iter_orders(self, seed):
+        """
+        Commandes et articles, rejouables à l'identique (même graine) : une
+        passe calcule les ventes, une autre écrit les lignes.
+        """
+        rng = random.Random(f'{seed}:orders')
+        statuses = [status for status, _ in ORDER_STATUSES]
+        status_weights = list(accumulate(weight for _, weight in ORDER_STATUSES))
+        # Popularité : quelques produits concentrent les ventes
+        popularity = list(range(self.product_count))
+        rng.shuffle(popularity)
+        for index in range(self.order_count):
+            order_pk = self.order_start + index
+            user_index = rng.randrange(self.user_count)
+            status = rng.choices(statuses, cum_weights=status_weights)[0]
+            items = []
+            for _ in range(rng.randint(1, 4)):
+                product_index = popularity[int(self.product_count * rng.random() ** 3)]
+                quantity = rng.randint(1, 3)
+                items.append((product_index, quantity, Decimal(f'{self.prices[product_index]:.2f}'), status != 'cancelled'))
+            created_at = self.timestamp(rng)
+            address = self.address_start + user_index
+            order = (
+                order_pk, self.user_start + user_index, address, address,
+                f'{SYNTHETIC_ORDER_PREFIX}{order_pk:09d}', status, rng.choice(PAYMENT_METHODS), status != 'pending',
+                sum(quantity * price for _, quantity, price, _ in items), created_at,
+                created_at + timedelta(seconds=rng.random() * 10 * 86400),
+            )
+            yield order, items
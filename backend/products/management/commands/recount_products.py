@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Category, SubCategory, Product, refresh_image_summaries, refresh_product_counters
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de produits publiés et le résumé des images des produits'
+
+    def handle(self, *args, **options):
+        refresh_product_counters()
+        refresh_image_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compteurs recalculés : {Category.objects.count()} catégories, "
+            f"{SubCategory.objects.count()} sous-catégories, {Product.objects.count()} produits"
+        ))
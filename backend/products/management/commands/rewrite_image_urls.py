@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from products.images import RESPONSIVE_WIDTHS, original_url, responsive_url
+from products.models import Category, ProductImage
+
+class Command(BaseCommand):
+    help = (
+        "Réécrit hors ligne les URL Cloudinary stockées (images des produits et des catégories) "
+        "en URL de largeur bornée f_auto/q_auto, ou les ramène à l'original avec --original. "
+        "Aucun appel à l'API Cloudinary : seules les URL sont modifiées en base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=max(RESPONSIVE_WIDTHS),
+                            help=f"Largeur maximale des images stockées (défaut : {max(RESPONSIVE_WIDTHS)})")
+        parser.add_argument('--original', action='store_true',
+                            help="Retire la transformation ajoutée et rétablit les URL des originaux")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les changements sans les enregistrer")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['original']:
+            def rewrite(url):
+                return original_url(url)
+        else:
+            def rewrite(url):
+                return responsive_url(url, options['width'])
+
+        images = self.rewrite_rows(ProductImage, 'image', rewrite, options)
+        categories = self.rewrite_rows(Category, 'image', rewrite, options)
+        verb = "à réécrire" if options['dry_run'] else "réécrites"
+        self.stdout.write(self.style.SUCCESS(
+            f"URL {verb} : {images} images de produits, {categories} images de catégories"
+        ))
+
+    def rewrite_rows(self, model, field, rewrite, options):
+        rows = model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+        changed = []
+        total = 0
+        for pk, url in rows.order_by('pk').values_list('pk', field).iterator(chunk_size=options['batch_size']):
+            new_url = rewrite(url)
+            if new_url == url:
+                continue
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{model.__name__} {pk} : {url} -> {new_url}")
+            changed.append(model(pk=pk, **{field: new_url}))
+            if len(changed) >= options['batch_size']:
+                total += self.save(model, field, changed, options)
+                changed = []
+        if changed:
+            total += self.save(model, field, changed, options)
+        return total
+
+    def save(self, model, field, objs, options):
+        if not options['dry_run']:
+            # bulk_update passe par update() : ProductImageQuerySet recalcule main_image_url
+            # des produits touchés, CatalogQuerySet invalide le cache des catégories
+            model.objects.bulk_update(objs, [field])
+        return len(objs)
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 import cloudinary.api
 import cloudinary
-from products.models import Category, Product, ProductImage
+from products.models import Category, Product, ProductImage, refresh_image_summaries
 
 class Command(BaseCommand):
     help = 'Synchronise les images Cloudinary existantes avec les produits'
@@ -123,6 +123,10 @@ class Command(BaseCommand):
                 self.stdout.write(f"✓ Image assignée au produit: {product.name}")
                 self.stdout.write(f"  URL: {image_data['secure_url']}")
         
+        # Les signaux tiennent à jour main_image_url et image_count image par
+        # image ; un dernier passage garantit la cohérence après la réécriture
+        refresh_image_summaries()
+        
         self.stdout.write("\n=== Synchronisation terminée ===")
 
     def list_cloudinary_structure(self):
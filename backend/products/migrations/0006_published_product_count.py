@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    SubCategory = apps.get_model('products', 'SubCategory')
+    Product = apps.get_model('products', 'Product')
+
+    for model, field in ((Category, 'category'), (SubCategory, 'subcategory')):
+        counts = Product.objects.filter(
+            **{field: OuterRef('pk')}, is_published=True, available=True
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        model.objects.update(published_product_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_auto_20250605_1351'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Produits publiés'),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='published_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Produits publiés'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
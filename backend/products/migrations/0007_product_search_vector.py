@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_search_vectors(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    SubCategory = apps.get_model('products', 'SubCategory')
+    Product = apps.get_model('products', 'Product')
+
+    category_name = Category.objects.filter(pk=OuterRef('category_id')).values('name')
+    subcategory_name = SubCategory.objects.filter(pk=OuterRef('subcategory_id')).values('name')
+    Product.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='french')
+        + SearchVector(Coalesce(Subquery(category_name), Value('')), weight='B', config='french')
+        + SearchVector(Coalesce(Subquery(subcategory_name), Value('')), weight='B', config='french')
+        + SearchVector('description', weight='C', config='french')
+    ))
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_published_product_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction :
+    # les index se construisent sans bloquer les écritures sur une base en service
+    atomic = False
+
+    dependencies = [
+        ('products', '0008_name_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['-created_at', '-id'], include=('updated_at',), name='product_public_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['category', '-created_at', '-id'], include=('updated_at',), name='product_category_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['subcategory', '-created_at', '-id'], include=('updated_at',), name='product_subcat_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True), ('featured', True)), fields=['-created_at', '-id'], include=('updated_at',), name='product_featured_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_sales_counts(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    sold = OrderItem.objects.filter(product=OuterRef('pk')).exclude(
+        order__status='cancelled'
+    ).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    Product.objects.update(sales_count=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+        ('products', '0009_catalog_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sales_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ventes'),
+        ),
+        migrations.RunPython(fill_sales_counts, migrations.RunPython.noop),
+    ]
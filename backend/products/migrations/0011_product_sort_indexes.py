@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('products', '0010_product_sales_count'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['price', 'id'], name='product_public_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['name', 'id'], name='product_public_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('available', True), ('is_published', True)), fields=['-sales_count', '-id'], name='product_public_sales_idx'),
+        ),
+    ]
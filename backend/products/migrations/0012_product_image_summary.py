@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_image_summaries(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+
+    main_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('-is_main', 'id').values('image')[:1]
+    counts = ProductImage.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+        total=Count('pk')
+    ).values('total')
+    Product.objects.update(
+        main_image_url=Coalesce(Subquery(main_image), Value('')),
+        image_count=Coalesce(Subquery(counts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_image_url',
+            field=models.URLField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(fill_image_summaries, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,53 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Now
 from django.utils.text import slugify
 
+from .cache import invalidate_catalog
+
+# Configuration PostgreSQL utilisée pour la recherche plein texte
+SEARCH_CONFIG = 'french'
+
+# Champs d'un produit qui influencent les compteurs de produits publiés
+COUNTER_FIELDS = {'category', 'category_id', 'subcategory', 'subcategory_id', 'is_published', 'available'}
+
+# Champs d'un produit qui composent son vecteur de recherche
+SEARCH_FIELDS = {'name', 'description', 'category', 'category_id', 'subcategory', 'subcategory_id'}
+
+# Champs d'un produit qui apparaissent dans les sitemaps (URL, lastmod, visibilité)
+SITEMAP_FIELDS = {'slug', 'updated_at', 'is_published', 'available'}
+
+# Sous-ensemble visible par le public, filtré par toutes les requêtes du catalogue
+PUBLIC_PRODUCTS = Q(available=True, is_published=True)
+
+class CatalogQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Les update() en masse ne passent pas par les signaux
+        rows = super().update(**kwargs)
+        invalidate_catalog(using=self.db)
+        return rows
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     image = models.URLField(max_length=1000, blank=True, null=True)
     is_published = models.BooleanField(default=False, verbose_name="Publié")
+    published_product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Produits publiés")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CatalogQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], name='category_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.name
@@ -36,14 +70,20 @@ class SubCategory(models.Model):
     slug = models.SlugField(max_length=100)
     description = models.TextField(blank=True)
     is_published = models.BooleanField(default=False, verbose_name="Publié")
+    published_product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Produits publiés")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CatalogQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Sous-catégorie"
         verbose_name_plural = "Sous-catégories"
         ordering = ['name']
         unique_together = ('category', 'slug')
+        indexes = [
+            GinIndex(fields=['name'], name='subcategory_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f"{self.category.name} - {self.name}"
@@ -53,6 +93,47 @@ class SubCategory(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+class ProductQuerySet(CatalogQuerySet):
+    def update(self, **kwargs):
+        """
+        Les mises à jour en masse (actions de publication de l'admin) ne
+        déclenchent pas de signaux : on recalcule donc les compteurs des
+        catégories et sous-catégories touchées, ainsi que les vecteurs de
+        recherche des produits modifiés.
+        """
+        # Tranches de sitemap (products.sitemaps) à régénérer : calculées avant la
+        # mise à jour, le filtre du queryset pouvant porter sur les champs modifiés
+        sitemap_chunks = None
+        if not SITEMAP_FIELDS.isdisjoint(kwargs):
+            from .sitemaps import queryset_chunks
+            sitemap_chunks = queryset_chunks(self)
+
+        touches_counters = not COUNTER_FIELDS.isdisjoint(kwargs)
+        touches_search = not SEARCH_FIELDS.isdisjoint(kwargs)
+        if not (touches_counters or touches_search):
+            rows = super().update(**kwargs)
+        else:
+            with transaction.atomic(using=self.db):
+                affected = list(self.values_list('pk', 'category_id', 'subcategory_id'))
+                rows = super().update(**kwargs)
+
+                if touches_search:
+                    refresh_search_vectors(Product.objects.filter(pk__in=[pk for pk, _, _ in affected]))
+
+                if touches_counters:
+                    category_ids = {category_id for _, category_id, _ in affected}
+                    subcategory_ids = {subcategory_id for _, _, subcategory_id in affected if subcategory_id}
+                    for field, ids in (('category', category_ids), ('subcategory', subcategory_ids)):
+                        for key in (field, f'{field}_id'):
+                            if kwargs.get(key) is not None:
+                                ids.add(getattr(kwargs[key], 'pk', kwargs[key]))
+                    refresh_product_counters(category_ids, subcategory_ids)
+
+        if sitemap_chunks:
+            from .sitemaps import invalidate_product_chunks
+            invalidate_product_chunks(sitemap_chunks)
+        return rows
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, related_name='products', null=True, blank=True)
@@ -66,11 +147,49 @@ class Product(models.Model):
     is_published = models.BooleanField(default=False, verbose_name="Publié")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Résumé des images pour les cartes produit, maintenu par products.signals
+    # et ProductImageQuerySet : URL de l'image principale (ou de la première)
+    main_image_url = models.URLField(max_length=500, blank=True, default='', editable=False)
+    image_count = models.PositiveIntegerField(default=0, editable=False)
+    # Unités vendues hors commandes annulées (tri par popularité), maintenu par orders.signals
+    sales_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Ventes")
+    # Nom (A) > catégorie et sous-catégorie (B) > description (C), maintenu par products.signals
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            GinIndex(fields=['name'], name='product_name_trgm', opclasses=['gin_trgm_ops']),
+            # Index partiels sur le catalogue public (disponible et publié), dans
+            # l'ordre des listes (-created_at, -id) ; updated_at est inclus pour
+            # que le calcul de l'ETag puisse se contenter de l'index
+            models.Index(
+                fields=['-created_at', '-id'], include=['updated_at'],
+                name='product_public_recent_idx', condition=PUBLIC_PRODUCTS,
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], include=['updated_at'],
+                name='product_category_recent_idx', condition=PUBLIC_PRODUCTS,
+            ),
+            models.Index(
+                fields=['subcategory', '-created_at', '-id'], include=['updated_at'],
+                name='product_subcat_recent_idx', condition=PUBLIC_PRODUCTS,
+            ),
+            models.Index(
+                fields=['-created_at', '-id'], include=['updated_at'],
+                name='product_featured_recent_idx', condition=PUBLIC_PRODUCTS & Q(featured=True),
+            ),
+            # Tris proposés par products.sorting, id en départage ; un index
+            # B-tree se parcourt dans les deux sens (prix, nom ou date, croissants ou décroissants)
+            models.Index(fields=['price', 'id'], name='product_public_price_idx', condition=PUBLIC_PRODUCTS),
+            models.Index(fields=['name', 'id'], name='product_public_name_idx', condition=PUBLIC_PRODUCTS),
+            models.Index(fields=['-sales_count', '-id'], name='product_public_sales_idx', condition=PUBLIC_PRODUCTS),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,12 +199,42 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    @property
+    def is_counted(self):
+        """Un produit compte dans les compteurs s'il est visible dans le catalogue"""
+        return self.is_published and self.available
+
+class ProductImageQuerySet(models.QuerySet):
+    """
+    Les écritures en masse ne déclenchent pas de signaux : le résumé des
+    images (main_image_url, image_count) des produits touchés est recalculé
+    ici. Les suppressions, elles, passent par les signaux post_delete.
+    """
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            product_ids = set(self.values_list('product_id', flat=True))
+            rows = super().update(**kwargs)
+            for key in ('product', 'product_id'):
+                if kwargs.get(key) is not None:
+                    product_ids.add(getattr(kwargs[key], 'pk', kwargs[key]))
+            product_images_changed(product_ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            product_images_changed({obj.product_id for obj in objs})
+        return objs
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.URLField(max_length=500)
     is_main = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProductImageQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Image du produit"
         verbose_name_plural = "Images des produits"
@@ -99,3 +248,80 @@ class ProductImage(models.Model):
         if self.image:
             return self.image
         return None
+
+def published_products_subquery(field):
+    """Nombre de produits visibles par catégorie (ou sous-catégorie), en sous-requête"""
+    counts = Product.objects.filter(
+        **{field: OuterRef('pk')}, is_published=True, available=True
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+def refresh_product_counters(category_ids=None, subcategory_ids=None):
+    """
+    Recalcule published_product_count en une requête UPDATE par table.
+    Sans identifiants, toutes les lignes sont recalculées ; seules celles
+    dont le compteur change voient leur updated_at avancer.
+    """
+    categories = Category.objects.all()
+    subcategories = SubCategory.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    if subcategory_ids is not None:
+        subcategories = subcategories.filter(pk__in=subcategory_ids)
+
+    for queryset, field in ((categories, 'category'), (subcategories, 'subcategory')):
+        actual = published_products_subquery(field)
+        queryset.alias(actual=actual).exclude(published_product_count=F('actual')).update(
+            published_product_count=actual, updated_at=Now()
+        )
+
+def main_image_subquery():
+    """URL de l'image principale (ou à défaut la première) d'un produit, '' sans image"""
+    images = ProductImage.objects.filter(product=OuterRef('pk')).order_by('-is_main', 'id')
+    return Coalesce(Subquery(images.values('image')[:1]), Value(''))
+
+def image_count_subquery():
+    counts = ProductImage.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+def refresh_image_summaries(product_ids=None):
+    """
+    Recalcule main_image_url et image_count en une requête UPDATE. Sans
+    identifiants, tous les produits sont recalculés ; seuls ceux dont le
+    résumé change voient leur updated_at avancer.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    main_image = main_image_subquery()
+    count = image_count_subquery()
+    products.alias(actual_image=main_image, actual_count=count).exclude(
+        main_image_url=F('actual_image'), image_count=F('actual_count')
+    ).update(main_image_url=main_image, image_count=count, updated_at=Now())
+
+def product_images_changed(product_ids):
+    """Les images font partie de la réponse produit : résumé recalculé et updated_at avancé"""
+    if not product_ids:
+        return
+    Product.objects.filter(pk__in=product_ids).update(
+        main_image_url=main_image_subquery(), image_count=image_count_subquery(), updated_at=Now()
+    )
+
+def product_search_vector():
+    """Vecteur tsvector pondéré d'un produit, utilisable dans un UPDATE (sans jointure)"""
+    category_name = Category.objects.filter(pk=OuterRef('category_id')).values('name')
+    subcategory_name = SubCategory.objects.filter(pk=OuterRef('subcategory_id')).values('name')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(Subquery(category_name), Value('')), weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(Subquery(subcategory_name), Value('')), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+def refresh_search_vectors(queryset=None):
+    """Recalcule search_vector pour les produits donnés (tous par défaut)"""
+    if queryset is None:
+        queryset = Product.objects.all()
+    return queryset.update(search_vector=product_search_vector())
@@ -0,0 +1,148 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) : chaque page est obtenue avec un
+    WHERE (tri, id) > (dernière valeur, dernier id) au lieu d'un OFFSET,
+    si bien qu'une page profonde coûte autant que la première.
+
+    Le curseur est opaque pour le client : il encode la position du
+    dernier élément vu et le sens de navigation.
+    """
+    page_size = 24
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    legacy_query_param = 'paginate'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def __init__(self, ordering=('-created_at',)):
+        # L'id sert de départage pour obtenir un ordre total et stable ;
+        # il suit le sens du premier champ pour rester couvert par un index.
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') != 'id':
+            descending = ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+
+    def is_legacy(self, request):
+        """Échappatoire temporaire, inutilisée par le front : liste complète avec ?paginate=false"""
+        return request.query_params.get(self.legacy_query_param, '').lower() in ('false', '0', 'no')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset pour les vues asynchrones"""
+        queryset, position, reverse = self.page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset], position, reverse)
+
+    def page_queryset(self, queryset, request):
+        """Requête de la page demandée (une ligne de plus pour savoir s'il y a une suite)"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+        return queryset[:self.page_size + 1], position, reverse
+
+    def set_page(self, rows, position, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        values = [self._value(row, field) for field in self.fields]
+        payload = json.dumps({'p': values, 'r': reverse}, separators=(',', ':'), default=str)
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _after(self, ordering, position):
+        """Construit (a, b) > (x, y) sous forme de Q, en respectant le sens de chaque champ"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _value(row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
@@ -0,0 +1,193 @@
+import json
+from decimal import Decimal
+from operator import itemgetter
+
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from jaelleshop.timing import measure
+
+from .images import image_srcset
+from .models import ProductImage
+from .serializers import ProductCardSerializer, ProductSerializer
+
+# Colonne de .values_list() lue pour chaque champ de ProductSerializer et ProductCardSerializer
+PRODUCT_COLUMNS = {
+    'id': 'id',
+    'name': 'name',
+    'slug': 'slug',
+    'description': 'description',
+    'price': 'price',
+    'stock': 'stock',
+    'available': 'available',
+    'featured': 'featured',
+    'category': 'category_id',
+    'category_name': 'category__name',
+    'subcategory': 'subcategory_id',
+    'subcategory_name': 'subcategory__name',
+    'created_at': 'created_at',
+    'main_image_url': 'main_image_url',
+    'image_count': 'image_count',
+}
+
+PRICE_QUANTUM = Decimal('0.01')
+
+def format_decimal(value):
+    """Même rendu que serializers.DecimalField(decimal_places=2) : chaîne à 2 décimales"""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(PRICE_QUANTUM))
+
+def format_datetime(value):
+    """Même rendu que serializers.DateTimeField : ISO 8601, UTC noté 'Z'"""
+    if value is None:
+        return None
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+# Champs lus à travers une relation nullable (source='subcategory.name') :
+# DRF les omet de la sortie quand la relation est vide
+OMITTED_IF_NULL = frozenset({'subcategory_name'})
+
+FORMATTERS = {
+    'price': format_decimal,
+    'created_at': format_datetime,
+    'main_image_url': lambda value: value or None,
+}
+
+def get_list_serializer_class(request):
+    """Sérialiseur des listes de produits : complet, ou cartes allégées avec ?view=card"""
+    if request is not None and request.query_params.get('view') == 'card':
+        return ProductCardSerializer
+    return ProductSerializer
+
+def is_fast_path_allowed(request):
+    """
+    Le chemin rapide ne produit que du JSON et ne sait pas développer les
+    relations : l'API navigable et ?expand= passent par ProductSerializer.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is None or renderer.format != 'json':
+        return False
+    # JSONRenderer indente si le client le demande (Accept: application/json; indent=4)
+    if 'indent' in (getattr(request, 'accepted_media_type', '') or ''):
+        return False
+    _, expanded = get_list_serializer_class(request).get_selected_fields(request)
+    return not expanded
+
+class ProductRowSerializer:
+    """
+    Équivalent de ProductSerializer(many=True) pour les listes : les lignes
+    sont lues avec .values_list() et converties en dictionnaires à l'aide
+    d'accesseurs calculés une fois pour toutes, sans instancier de modèles
+    ni passer par les champs DRF. Le JSON produit est identique octet pour
+    octet à celui de ProductSerializer (mêmes champs, même ordre, mêmes
+    formats), y compris avec ?fields= et ?omit=. Avec ?view=card, il
+    reproduit ProductCardSerializer. `fields` impose une liste de champs
+    (exports), indépendamment de la requête.
+    """
+
+    def __init__(self, request=None, extra_columns=(), fields=None, using=None):
+        if fields is None:
+            serializer_class = get_list_serializer_class(request)
+            selected, _ = serializer_class.get_selected_fields(request)
+            fields = [name for name in serializer_class.Meta.fields if name in selected]
+        self.fields = list(fields)
+        self.with_images = 'images' in self.fields
+        # Base lue pour les images (None : choix du routeur)
+        self.using = using
+
+        # L'id sert à rattacher les images ; les colonnes supplémentaires (champs
+        # de tri pour le curseur, clé de recherche) sont lues sans être renvoyées
+        self.columns = ['id']
+        for name in self.fields:
+            column = PRODUCT_COLUMNS.get(name)
+            if column and column not in self.columns:
+                self.columns.append(column)
+        for name in extra_columns:
+            if name not in self.columns:
+                self.columns.append(name)
+
+        self.accessors = []
+        for name in self.fields:
+            if name == 'images':
+                self.accessors.append((name, None, None, False))
+            else:
+                index = self.columns.index(PRODUCT_COLUMNS[name])
+                self.accessors.append((name, itemgetter(index), FORMATTERS.get(name), name in OMITTED_IF_NULL))
+
+    def get_queryset(self, queryset):
+        """Lignes nommées, utilisables telles quelles par KeysetPagination"""
+        return queryset.values_list(*self.columns, named=True)
+
+    def to_representation(self, rows):
+        with measure('serialize'):
+            rows = list(rows)
+            images = self.get_images([row[0] for row in rows]) if self.with_images else {}
+            return self.build(rows, images)
+
+    async def ato_representation(self, rows):
+        """to_representation pour les vues asynchrones (rows : queryset ou liste de lignes)"""
+        with measure('serialize'):
+            if isinstance(rows, QuerySet):
+                rows = [row async for row in rows]
+            images = {}
+            if self.with_images and rows:
+                images = self.group_images([image async for image in self.images_queryset([row[0] for row in rows])])
+            return self.build(rows, images)
+
+    def build(self, rows, images):
+        accessors = self.accessors
+        data = []
+        for row in rows:
+            item = {}
+            for name, getter, formatter, omitted_if_null in accessors:
+                if getter is None:
+                    item[name] = images.get(row[0], [])
+                    continue
+                value = getter(row)
+                if value is None and omitted_if_null:
+                    continue
+                item[name] = value if formatter is None else formatter(value)
+            data.append(item)
+        return data
+
+    def get_images(self, product_ids):
+        """Images de tous les produits de la page en une requête, au format de ProductImageSerializer"""
+        if not product_ids:
+            return {}
+        return self.group_images(self.images_queryset(product_ids))
+
+    def images_queryset(self, product_ids):
+        return ProductImage.objects.using(self.using).filter(product_id__in=product_ids).values_list(
+            'product_id', 'id', 'image', 'is_main'
+        )
+
+    def group_images(self, rows):
+        images = {}
+        for product_id, image_id, image, is_main in rows:
+            images.setdefault(product_id, []).append({
+                'id': image_id,
+                'image': image,
+                'is_main': is_main,
+                'image_url': image or None,
+                'srcset': image_srcset(image),
+            })
+        return images
+
+def render_json(data):
+    """Mêmes octets que rest_framework.renderers.JSONRenderer avec les réglages par défaut"""
+    with measure('render'):
+        return encode_json(data)
+
+def encode_json(data):
+    content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    content = content.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return content.encode('utf-8')
+
+def json_response(data, status=200):
+    return HttpResponse(render_json(data), content_type='application/json', status=status)
@@ -0,0 +1,90 @@
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import SEARCH_CONFIG, Category, SubCategory, Product
+
+# Longueur minimale d'une saisie pour l'autocomplétion (un trigramme)
+AUTOCOMPLETE_MIN_LENGTH = 3
+AUTOCOMPLETE_DEFAULT_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+# Nombre de résultats renvoyés par la recherche plein texte
+SEARCH_DEFAULT_LIMIT = 48
+SEARCH_MAX_LIMIT = 100
+
+def parse_limit(value, default, maximum):
+    """Paramètre ?limit= borné entre 1 et `maximum`, `default` s'il est absent ou invalide"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+def build_search_query(text):
+    """Requête tsquery au format « moteur de recherche » (guillemets, OR, -exclusion)"""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+def filter_products(queryset, text):
+    """Filtre les produits sur le vecteur indexé, sans classement"""
+    return queryset.filter(search_vector=build_search_query(text))
+
+def search_products(queryset, text, limit=SEARCH_DEFAULT_LIMIT):
+    """
+    Les `limit` produits les plus pertinents, classés par pertinence et annotés
+    d'un extrait de leur description où les termes trouvés sont entourés de <mark>.
+    Le classement porte sur tous les produits trouvés, mais l'extrait (ts_headline,
+    coûteux) n'est calculé que pour les produits retenus par la sous-requête.
+    """
+    query = build_search_query(text)
+    best = queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+    ).order_by('-rank', '-id')[:limit]
+    return queryset.filter(pk__in=best.values('pk')).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        snippet=SearchHeadline(
+            'description',
+            query,
+            config=SEARCH_CONFIG,
+            start_sel='<mark>',
+            stop_sel='</mark>',
+            max_words=30,
+            min_words=10,
+        ),
+    ).order_by('-rank', '-id')
+
+def autocomplete_products(text, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+    """
+    Suggestions tolérantes aux fautes de frappe par similarité de trigrammes
+    sur le nom du produit, de sa catégorie et de sa sous-catégorie.
+    Chaque opérateur %> est servi par un index GIN gin_trgm_ops.
+    """
+    text = text.strip()
+    if len(text) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+
+    categories = Category.objects.filter(is_published=True, name__trigram_word_similar=text)
+    subcategories = SubCategory.objects.filter(is_published=True, name__trigram_word_similar=text)
+
+    products = Product.objects.filter(
+        Q(name__trigram_word_similar=text)
+        | Q(category__in=categories.values('pk'))
+        | Q(subcategory__in=subcategories.values('pk')),
+        available=True,
+        is_published=True,
+    ).annotate(
+        similarity=Greatest(
+            TrigramWordSimilarity(text, 'name'),
+            TrigramWordSimilarity(text, 'category__name'),
+            TrigramWordSimilarity(text, 'subcategory__name'),
+        ),
+    ).order_by('-similarity', '-id')
+
+    return [
+        {'slug': slug, 'name': name, 'price': str(price), 'image': image or None}
+        for slug, name, price, image in products.values_list('slug', 'name', 'price', 'main_image_url')[:limit]
+    ]
@@ -1,28 +1,98 @@
 from rest_framework import serializers
+from .images import image_srcset
 from .models import Category, SubCategory, Product, ProductImage
 
+SPARSE_FIELDSET_PARAMS = ('fields', 'omit', 'expand')
+
+def _split_param(value):
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+def sparse_fieldset_params(request):
+    """Paramètres ?fields= / ?omit= / ?expand= de la requête (pour les clés de cache)"""
+    return {name: request.query_params.get(name) for name in SPARSE_FIELDSET_PARAMS}
+
+class SparseFieldsetMixin:
+    """
+    Réponses partielles pilotées par la requête (context['request']) ou par
+    les arguments fields/omit du constructeur :
+    
+    ?fields=id,name,price  ne garde que ces champs
+    ?omit=description      retire ces champs
+    ?expand=category       remplace l'identifiant par l'objet imbriqué
+                           (champs listés dans Meta.expandable_fields)
+    
+    setup_eager_loading() applique la même sélection au queryset pour que les
+    relations omises ne soient ni jointes ni préchargées.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+    
+        if fields is None and omit is None:
+            selected, expanded = self.get_selected_fields(self.context.get('request'))
+        else:
+            selected = set(self.Meta.fields) & set(fields or self.Meta.fields)
+            selected -= set(omit or ())
+            expanded = set()
+    
+        for name in expanded:
+            self.fields[name] = self.Meta.expandable_fields[name]()
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+    
+    @classmethod
+    def get_selected_fields(cls, request):
+        """(champs conservés, champs à développer) pour la requête donnée"""
+        selected = set(cls.Meta.fields)
+        if request is None:
+            return selected, set()
+    
+        params = request.query_params
+        fields = _split_param(params.get('fields'))
+        if fields:
+            selected &= fields
+        selected -= _split_param(params.get('omit'))
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        expanded = _split_param(params.get('expand')) & selected & set(expandable)
+        return selected, expanded
+
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    # Variantes de largeur bornée (products.images), None hors Cloudinary
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_main', 'image_url']
+        fields = ['id', 'image', 'is_main', 'image_url', 'srcset']
         
     def get_image_url(self, obj):
         # Utiliser la méthode get_image_url du modèle
         return obj.get_image_url
+    
+    def get_srcset(self, obj):
+        return image_srcset(obj.image)
 
-class SubCategorySerializer(serializers.ModelSerializer):
-    products_count = serializers.SerializerMethodField()
+class SubCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Compteur dénormalisé, maintenu par products.signals
+    products_count = serializers.IntegerField(source='published_product_count', read_only=True)
     
     class Meta:
         model = SubCategory
         fields = ['id', 'name', 'slug', 'description', 'products_count']
     
-    def get_products_count(self, obj):
-        return obj.products.filter(is_published=True).count()
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        selected, _ = cls.get_selected_fields(request)
+        if 'description' not in selected:
+            queryset = queryset.defer('description')
+        return queryset
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     subcategory_name = serializers.CharField(source='subcategory.name', read_only=True)
@@ -35,9 +105,67 @@ class ProductSerializer(serializers.ModelSerializer):
             'category_name', 'subcategory', 'subcategory_name', 
             'images', 'created_at'
         ]
+        expandable_fields = {
+            'category': lambda: CategorySerializer(read_only=True, omit=['subcategories']),
+            'subcategory': lambda: SubCategorySerializer(read_only=True),
+        }
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        selected, expanded = cls.get_selected_fields(request)
+        # Le vecteur de recherche n'est jamais renvoyé
+        queryset = queryset.defer('search_vector')
+        if 'description' not in selected:
+            queryset = queryset.defer('description')
+        related = [
+            name for name in ('category', 'subcategory')
+            if f'{name}_name' in selected or name in expanded
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if 'images' in selected:
+            queryset = queryset.prefetch_related('images')
+        return queryset
 
-class CategorySerializer(serializers.ModelSerializer):
-    products_count = serializers.SerializerMethodField()
+class ProductCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Version allégée pour les grilles (?view=card) : l'image principale et le
+    nombre d'images sont lus sur le produit, sans toucher à la table des images.
+    """
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    subcategory_name = serializers.CharField(source='subcategory.name', read_only=True)
+    main_image_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'name', 'slug', 'price', 'stock', 'available', 'featured',
+            'category', 'category_name', 'subcategory', 'subcategory_name',
+            'main_image_url', 'image_count', 'created_at'
+        ]
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        selected, _ = cls.get_selected_fields(request)
+        queryset = queryset.defer('search_vector', 'description')
+        related = [name for name in ('category', 'subcategory') if f'{name}_name' in selected]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+    
+    def get_main_image_url(self, obj):
+        # Même convention que ProductImage.get_image_url : None sans image
+        return obj.main_image_url or None
+
+class ProductSearchSerializer(ProductSerializer):
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['rank', 'snippet']
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    products_count = serializers.IntegerField(source='published_product_count', read_only=True)
     image_url = serializers.SerializerMethodField()
     subcategories = SubCategorySerializer(many=True, read_only=True)
     
@@ -45,14 +173,18 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'image', 'image_url', 'products_count', 'subcategories']
     
-    def get_products_count(self, obj):
-        return obj.products.filter(is_published=True).count()
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        selected, _ = cls.get_selected_fields(request)
+        if 'subcategories' in selected:
+            queryset = queryset.prefetch_related('subcategories')
+        return queryset
         
     def get_image_url(self, obj):
         # Utiliser la méthode get_image_url du modèle
         return obj.get_image_url
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     subcategory = SubCategorySerializer(read_only=True)
@@ -63,4 +195,22 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'description', 'price', 
             'stock', 'available', 'featured', 'category', 
             'subcategory', 'images', 'created_at', 'updated_at'
-        ] 
\ No newline at end of file
+        ]
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        selected, _ = cls.get_selected_fields(request)
+        queryset = queryset.defer('search_vector')
+        if 'description' not in selected:
+            queryset = queryset.defer('description')
+        related = [name for name in ('category', 'subcategory') if name in selected]
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetch = []
+        if 'images' in selected:
+            prefetch.append('images')
+        if 'category' in selected:
+            prefetch.append('category__subcategories')
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
\ No newline at end of file
@@ -0,0 +1,104 @@
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_catalog
+from .sitemaps import chunk_of, invalidate_product_chunks
+from .models import (
+    Category,
+    SubCategory,
+    Product,
+    ProductImage,
+    product_images_changed,
+    refresh_search_vectors,
+)
+
+def _adjust_counters(category_id, subcategory_id, delta):
+    # updated_at avance aussi : le compteur fait partie des réponses de l'API
+    Category.objects.filter(pk=category_id).update(
+        published_product_count=F('published_product_count') + delta, updated_at=Now()
+    )
+    if subcategory_id:
+        SubCategory.objects.filter(pk=subcategory_id).update(
+            published_product_count=F('published_product_count') + delta, updated_at=Now()
+        )
+
+@receiver(pre_save, sender=Product)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    """Mémorise la contribution du produit aux compteurs avant l'enregistrement"""
+    instance._counted_state = None
+    if raw or instance.pk is None:
+        return
+    previous = Product.objects.filter(pk=instance.pk).values(
+        'category_id', 'subcategory_id', 'is_published', 'available'
+    ).first()
+    if previous and previous['is_published'] and previous['available']:
+        instance._counted_state = (previous['category_id'], previous['subcategory_id'])
+
+@receiver(post_save, sender=Product)
+def update_counters_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_counted_state', None)
+    after = (instance.category_id, instance.subcategory_id) if instance.is_counted else None
+    if before == after:
+        return
+    if before:
+        _adjust_counters(*before, -1)
+    if after:
+        _adjust_counters(*after, 1)
+
+@receiver(post_delete, sender=Product)
+def update_counters_on_delete(sender, instance, **kwargs):
+    if instance.is_counted:
+        _adjust_counters(instance.category_id, instance.subcategory_id, -1)
+
+@receiver(post_save, sender=Product)
+def update_search_vector(sender, instance, raw=False, **kwargs):
+    # Chargement de fixtures (loaddata) : le vecteur fourni est conservé, refresh_search_vectors() le recalcule au besoin
+    if raw:
+        return
+    # Mise à jour directe en base : pas de nouveau signal, updated_at inchangé
+    refresh_search_vectors(Product.objects.filter(pk=instance.pk))
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=SubCategory)
+def remember_name(sender, instance, raw=False, **kwargs):
+    instance._previous_name = None
+    if not raw and instance.pk is not None:
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def refresh_products_on_rename(sender, instance, created=False, raw=False, **kwargs):
+    """Le nom de la catégorie fait partie du vecteur de recherche de ses produits"""
+    if raw or created or getattr(instance, '_previous_name', None) == instance.name:
+        return
+    field = 'category' if sender is Category else 'subcategory'
+    products = Product.objects.filter(**{field: instance})
+    refresh_search_vectors(products)
+    # Le nom apparaît aussi dans les réponses produits (category_name, subcategory_name)
+    products.update(updated_at=Now())
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def update_product_on_image_change(sender, instance, **kwargs):
+    """Résumé des images (main_image_url, image_count) et updated_at du produit"""
+    product_images_changed([instance.product_id])
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_sitemap(sender, instance, raw=False, **kwargs):
+    """Seule la tranche de sitemap du produit est régénérée"""
+    if not raw:
+        invalidate_product_chunks([chunk_of(instance.pk)])
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, using=None, **kwargs):
+    invalidate_catalog(using=using)
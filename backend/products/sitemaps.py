@@ -0,0 +1,230 @@
+"""
+Sitemaps du site : un index, une sitemap des catégories, une des
+sous-catégories et des sitemaps de produits par tranches d'identifiants.
+
+La tranche n couvre les produits d'id [n * SITEMAP_CHUNK_SIZE, (n + 1) *
+SITEMAP_CHUNK_SIZE[ : un produit reste toujours dans la même tranche et une
+tranche ne dépasse jamais la limite de 50 000 URL du protocole. Chaque
+tranche est mise en cache (XML compressé en gzip) sous son propre numéro de
+version, incrémenté quand un de ses produits change : les robots ne
+déclenchent jamais de lecture complète de la table des produits.
+"""
+import gzip
+import hashlib
+import time
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Value
+from django.http import Http404, HttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from jaelleshop.replicas import primary_reads
+
+from .cache import get_or_build
+from .models import PUBLIC_PRODUCTS, Category, Product, SubCategory
+
+SITEMAP_CHUNK_SIZE = 50000
+# Les clés sont versionnées : ce délai ne sert qu'à purger les anciennes versions
+SITEMAP_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+SITEMAP_MAX_AGE = 10 * 60
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def chunk_version_key(chunk):
+    return f'sitemap:products:{chunk}:version'
+
+def get_chunk_versions(chunks):
+    """Version courante de chaque tranche, initialisée à l'horodatage courant si absente"""
+    keys = {chunk: chunk_version_key(chunk) for chunk in chunks}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for chunk, key in keys.items():
+        if key not in found:
+            # Horodatage initial : jamais de retour sur une version déjà utilisée
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key)
+        versions[chunk] = found[key]
+    return versions
+
+def bump_chunks(chunks):
+    for chunk in chunks:
+        try:
+            cache.incr(chunk_version_key(chunk))
+        except ValueError:
+            cache.set(chunk_version_key(chunk), int(time.time() * 1000), None)
+
+def invalidate_product_chunks(chunks):
+    """
+    Rend obsolètes les tranches données après validation de la transaction
+    en cours : une régénération plus tôt relirait les anciennes données.
+    """
+    chunks = set(chunks)
+    if chunks:
+        transaction.on_commit(lambda: bump_chunks(chunks))
+
+def chunk_of(product_id):
+    return product_id // SITEMAP_CHUNK_SIZE
+
+def queryset_chunks(queryset):
+    """Tranches des produits d'un queryset, calculées en base"""
+    return set(
+        queryset.order_by().annotate(sitemap_chunk=F('id') / Value(SITEMAP_CHUNK_SIZE))
+        .values_list('sitemap_chunk', flat=True).distinct()
+    )
+
+def site_url(request):
+    """Origine des URL publiées : SITE_URL, sinon celle de la requête"""
+    return settings.SITE_URL or request.build_absolute_uri('/').rstrip('/')
+
+def w3c_datetime(value):
+    return value.isoformat(timespec='seconds') if value else None
+
+def render_urlset(entries):
+    """Sitemap compressée en gzip à partir de couples (URL, lastmod)"""
+    lines = [XML_HEADER, f'<urlset xmlns="{SITEMAP_NAMESPACE}">\n']
+    for loc, lastmod in entries:
+        lines.append(f'<url><loc>{escape(loc)}</loc><lastmod>{w3c_datetime(lastmod)}</lastmod></url>\n')
+    lines.append('</urlset>\n')
+    return gzip.compress(''.join(lines).encode('utf-8'), mtime=0)
+
+def sitemap_part(entries):
+    """Sitemap prête à servir : contenu compressé, ETag, lastmod et nombre d'URL"""
+    content = render_urlset(entries)
+    return {
+        'content': content,
+        'etag': hashlib.md5(content).hexdigest(),
+        'lastmod': max((lastmod for _, lastmod in entries), default=None),
+        'count': len(entries),
+    }
+
+def product_chunk_key(chunk, version, base, kind):
+    return f'sitemap:products:{chunk}:{version}:{hashlib.sha1(base.encode("utf-8")).hexdigest()[:12]}:{kind}'
+
+def build_product_chunk(chunk, base):
+    start = chunk * SITEMAP_CHUNK_SIZE
+    products = Product.objects.filter(
+        PUBLIC_PRODUCTS, id__gte=start, id__lt=start + SITEMAP_CHUNK_SIZE
+    ).order_by('id').values_list('slug', 'updated_at')
+    with primary_reads():
+        entries = [(f'{base}/products/{slug}', updated_at) for slug, updated_at in products.iterator(chunk_size=5000)]
+    return sitemap_part(entries)
+
+def get_product_chunks(chunks, base, with_content=False):
+    """
+    Tranches demandées, construites et mises en cache si besoin. Sans
+    with_content, seules les métadonnées (lastmod, nombre d'URL) sont lues.
+    """
+    versions = get_chunk_versions(chunks)
+    meta_keys = {chunk: product_chunk_key(chunk, versions[chunk], base, 'meta') for chunk in chunks}
+    content_keys = {chunk: product_chunk_key(chunk, versions[chunk], base, 'content') for chunk in chunks}
+    found = cache.get_many(list(meta_keys.values()) + (list(content_keys.values()) if with_content else []))
+
+    parts = {}
+    for chunk in chunks:
+        meta = found.get(meta_keys[chunk])
+        content = found.get(content_keys[chunk])
+        if meta is None or (with_content and content is None):
+            part = build_product_chunk(chunk, base)
+            content = part.pop('content')
+            meta = part
+            cache.set_many({meta_keys[chunk]: meta, content_keys[chunk]: content}, SITEMAP_CACHE_TIMEOUT)
+        parts[chunk] = {**meta, 'content': content} if with_content else meta
+    return parts
+
+def product_chunk_range():
+    """Tranches existantes, d'après le plus grand identifiant (lecture de l'index de la clé primaire)"""
+    max_id = Product.objects.aggregate(max_id=Max('id'))['max_id']
+    return range(chunk_of(max_id) + 1) if max_id is not None else range(0)
+
+def get_category_sitemap(base):
+    def build():
+        categories = Category.objects.filter(is_published=True).order_by('id')
+        return sitemap_part([
+            (f'{base}/categories/{slug}', updated_at)
+            for slug, updated_at in categories.values_list('slug', 'updated_at')
+        ])
+    return get_or_build('sitemap-categories', {'base': base}, build, timeout=SITEMAP_CACHE_TIMEOUT)
+
+def get_subcategory_sitemap(base):
+    def build():
+        # Le frontend affiche une sous-catégorie comme un filtre de la liste des produits
+        subcategories = SubCategory.objects.filter(
+            is_published=True, category__is_published=True
+        ).order_by('id').values_list('category__slug', 'slug', 'updated_at')
+        return sitemap_part([
+            (f'{base}/products?category={category_slug}&subcategory={slug}', updated_at)
+            for category_slug, slug, updated_at in subcategories
+        ])
+    return get_or_build('sitemap-subcategories', {'base': base}, build, timeout=SITEMAP_CACHE_TIMEOUT)
+
+def sitemap_response(request, content, etag, lastmod=None):
+    """Réponse conditionnelle, servie compressée aux clients qui acceptent gzip"""
+    compressed = bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    # ETag propre à chaque représentation, comme pour index.html
+    quoted_etag = quote_etag(f'{etag}-gzip' if compressed else etag)
+    # Secondes entières, comme If-Modified-Since : une fraction empêcherait toute réponse 304
+    last_modified = int(lastmod.timestamp()) if lastmod else None
+    response = get_conditional_response(request, etag=quoted_etag, last_modified=last_modified)
+    if response is None:
+        body = content if compressed else gzip.decompress(content)
+        response = HttpResponse(body, content_type='application/xml; charset=utf-8')
+        response['Content-Length'] = str(len(body))
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = quoted_etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=SITEMAP_MAX_AGE)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+def serve_part(request, part):
+    if not part['count']:
+        raise Http404("Sitemap vide")
+    return sitemap_response(request, part['content'], part['etag'], part['lastmod'])
+
+def sitemap_index(request):
+    """Index des sitemaps, composé à partir des métadonnées en cache de chaque partie"""
+    base = site_url(request)
+    parts = [
+        (reverse('sitemap-categories'), get_category_sitemap(base)),
+        (reverse('sitemap-subcategories'), get_subcategory_sitemap(base)),
+    ]
+    chunks = get_product_chunks(product_chunk_range(), base)
+    parts += [(reverse('sitemap-products', args=[chunk]), part) for chunk, part in chunks.items()]
+
+    lines = [XML_HEADER, f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n']
+    for path, part in parts:
+        if not part['count']:
+            continue
+        lines.append(f'<sitemap><loc>{escape(base + path)}</loc>')
+        if part['lastmod']:
+            lines.append(f'<lastmod>{w3c_datetime(part["lastmod"])}</lastmod>')
+        lines.append('</sitemap>\n')
+    lines.append('</sitemapindex>\n')
+    content = ''.join(lines).encode('utf-8')
+    lastmod = max((part['lastmod'] for _, part in parts if part['lastmod']), default=None)
+    return sitemap_response(request, gzip.compress(content, mtime=0), hashlib.md5(content).hexdigest(), lastmod)
+
+def category_sitemap(request):
+    return serve_part(request, get_category_sitemap(site_url(request)))
+
+def subcategory_sitemap(request):
+    return serve_part(request, get_subcategory_sitemap(site_url(request)))
+
+def product_sitemap(request, chunk):
+    if chunk not in product_chunk_range():
+        raise Http404("Sitemap inconnue")
+    return serve_part(request, get_product_chunks([chunk], site_url(request), with_content=True)[chunk])
+
+def robots_txt(request):
+    """Indique l'index des sitemaps aux robots"""
+    content = f"User-agent: *\nAllow: /\n\nSitemap: {site_url(request)}{reverse('sitemap-index')}\n"
+    return HttpResponse(content, content_type='text/plain; charset=utf-8')
@@ -0,0 +1,41 @@
+# Tris proposés par l'API (?sort_by=) et ordre SQL correspondant. Chacun est
+# couvert par un index partiel de Product.Meta.indexes, parcouru dans un sens
+# ou dans l'autre ; KeysetPagination ajoute l'id en départage, dans le sens du
+# premier champ, pour un ordre total.
+PRODUCT_SORTS = {
+    'newest': ('-created_at',),
+    'oldest': ('created_at',),
+    'price_asc': ('price',),
+    'price_desc': ('-price',),
+    'name_asc': ('name',),
+    'name_desc': ('-name',),
+    'popularity': ('-sales_count',),
+}
+DEFAULT_PRODUCT_SORT = 'newest'
+
+# Champs de tri mis à jour sans avancer updated_at (compteurs) : leur somme entre
+# dans l'ETag des listes ainsi triées, dont l'ordre change avec eux
+SORT_VALIDATOR_FIELDS = {
+    'popularity': ('sales_count',),
+}
+
+# Anciennes valeurs de sort_by (nom de champ) : tri croissant et décroissant
+LEGACY_SORTS = {
+    'created_at': ('oldest', 'newest'),
+    'price': ('price_asc', 'price_desc'),
+    'name': ('name_asc', 'name_desc'),
+}
+
+def resolve_product_sort(params):
+    """
+    Nom du tri demandé, ou None s'il est inconnu. Les anciennes valeurs
+    (nom de champ + sort_order) restent acceptées et gardent leur sens :
+    décroissant pour sort_order=desc (défaut), croissant sinon.
+    """
+    sort_by = params.get('sort_by') or DEFAULT_PRODUCT_SORT
+    if sort_by in PRODUCT_SORTS:
+        return sort_by
+    if sort_by in LEGACY_SORTS:
+        ascending, descending = LEGACY_SORTS[sort_by]
+        return descending if params.get('sort_order', 'desc') == 'desc' else ascending
+    return None
@@ -1,3 +1,481 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from jaelleshop.replicas import PRIMARY, ReplicaRouter, RoutingState, _state, primary_reads
+from orders.models import Order, OrderItem
+
+from .api.async_views import CategoryListAsyncView
+from .cache import get_catalog_version
+from .facets import facets_cache_key
+from .images import RESPONSIVE_WIDTHS, image_srcset, original_url, responsive_url
+from .management.commands.check_query_budget import QUERY_BUDGETS
+from .models import Category, Product, ProductImage, SubCategory
+
+class CatalogTestCase(TestCase):
+    """Catalogue public minimal ; le cache est vidé pour ne rien hériter d'un autre test"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Montres", slug='montres', is_published=True)
+
+    def create_products(self, count, prefix='produit', created_at=None, **fields):
+        fields.setdefault('category', self.category)
+        fields.setdefault('description', "Description")
+        fields.setdefault('price', '10.00')
+        fields.setdefault('is_published', True)
+        products = [
+            Product.objects.create(
+                name=f"{prefix} {index}", slug=f'{prefix}-{index}',
+                **fields,
+            )
+            for index in range(count)
+        ]
+        if created_at is not None:
+            Product.objects.filter(pk__in=[product.pk for product in products]).update(created_at=created_at)
+        return products
+
+class KeysetPaginationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Deux groupes créés au même instant : l'ordre y est départagé par l'id décroissant
+        recent = self.create_products(4, 'recent', created_at=now)
+        older = self.create_products(3, 'ancien', created_at=now - timedelta(days=1))
+        self.expected = [
+            product.slug for group in (recent, older) for product in sorted(group, key=lambda p: -p.pk)
+        ]
+
+    def get_page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_next_links_cover_every_product_once(self):
+        page = self.get_page(reverse('api-product-list'), page_size=2)
+        slugs = []
+        while True:
+            slugs += [product['slug'] for product in page['results']]
+            if page['next'] is None:
+                break
+            page = self.get_page(page['next'])
+        self.assertEqual(slugs, self.expected)
+
+    def test_previous_link_returns_to_previous_page(self):
+        first = self.get_page(reverse('api-product-list'), page_size=3)
+        self.assertIsNone(first['previous'])
+        second = self.get_page(first['next'])
+        back = self.get_page(second['previous'])
+        self.assertEqual(back['results'], first['results'])
+        self.assertEqual(back['next'], first['next'])
+
+    def test_page_boundary_inside_created_at_tie(self):
+        # La première page s'arrête au milieu des produits créés au même instant
+        first = self.get_page(reverse('api-product-list'), page_size=2)
+        second = self.get_page(first['next'])
+        self.assertEqual([product['slug'] for product in second['results']], self.expected[2:4])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('api-product-list'), {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_paginate_false_returns_full_list(self):
+        for url in (reverse('api-product-list'), reverse('api-category-products', args=[self.category.slug])):
+            with self.subTest(url=url):
+                data = self.get_page(url, paginate='false')
+                self.assertIsInstance(data, list)
+                self.assertEqual([product['slug'] for product in data], self.expected)
+
+class ProductSortTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for index, name in enumerate(["Bracelet", "Cadran", "Aiguille"]):
+            product = Product.objects.create(
+                category=self.category, name=name, slug=name.lower(),
+                description="Description", price=f'{10 + index}.00', is_published=True,
+            )
+            Product.objects.filter(pk=product.pk).update(created_at=now - timedelta(days=index))
+
+    def slugs(self, **params):
+        response = self.client.get(reverse('api-product-list'), {'paginate': 'false', **params})
+        self.assertEqual(response.status_code, 200)
+        return [product['slug'] for product in response.json()]
+
+    def test_sorts(self):
+        self.assertEqual(self.slugs(), ['bracelet', 'cadran', 'aiguille'])
+        self.assertEqual(self.slugs(sort_by='oldest'), ['aiguille', 'cadran', 'bracelet'])
+        self.assertEqual(self.slugs(sort_by='name_asc'), ['aiguille', 'bracelet', 'cadran'])
+        self.assertEqual(self.slugs(sort_by='name_desc'), ['cadran', 'bracelet', 'aiguille'])
+        self.assertEqual(self.slugs(sort_by='price_desc'), ['aiguille', 'cadran', 'bracelet'])
+
+    def test_legacy_field_sorts_keep_their_direction(self):
+        # Ancienne API : sort_order=desc par défaut, croissant pour toute autre valeur
+        self.assertEqual(self.slugs(sort_by='created_at', sort_order='asc'), ['aiguille', 'cadran', 'bracelet'])
+        self.assertEqual(self.slugs(sort_by='created_at'), ['bracelet', 'cadran', 'aiguille'])
+        self.assertEqual(self.slugs(sort_by='name'), ['cadran', 'bracelet', 'aiguille'])
+        self.assertEqual(self.slugs(sort_by='name', sort_order='asc'), ['aiguille', 'bracelet', 'cadran'])
+        self.assertEqual(self.slugs(sort_by='price', sort_order='asc'), ['bracelet', 'cadran', 'aiguille'])
+
+    def test_unknown_sort(self):
+        response = self.client.get(reverse('api-product-list'), {'sort_by': 'stock'})
+        self.assertEqual(response.status_code, 400)
+
+class CatalogCacheTests(CatalogTestCase):
+    def test_version_bumped_after_commit(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Horlogerie"
+            self.category.save()
+            Category.objects.filter(pk=self.category.pk).update(description="Nouvelle description")
+            # Dans la transaction, le cache garde la version des données validées
+            self.assertEqual(get_catalog_version(), version)
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_category_list_reflects_committed_rename(self):
+        url = reverse('api-category-list')
+        self.assertEqual(self.client.get(url).json()[0]['name'], "Montres")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Horlogerie"
+            self.category.save()
+        self.assertEqual(self.client.get(url).json()[0]['name'], "Horlogerie")
+
+class FeaturedSnapshotTests(CatalogTestCase):
+    def featured_names(self):
+        response = self.client.get(reverse('api-featured-products'))
+        self.assertEqual(response.status_code, 200)
+        return [(product['name'], product['category_name']) for product in response.json()]
+
+    def test_snapshot_follows_committed_writes(self):
+        product, = self.create_products(1, featured=True)
+        self.assertEqual(self.featured_names(), [("produit 0", "Montres")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Horlogerie"
+            self.category.save()
+        self.assertEqual(self.featured_names(), [("produit 0", "Horlogerie")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=product.pk).update(featured=False)
+        self.assertEqual(self.featured_names(), [])
+
+    def test_plain_update_runs_a_single_query(self):
+        product, = self.create_products(1, featured=True)
+        with self.assertNumQueries(1):
+            Product.objects.filter(pk=product.pk).update(stock=3)
+
+class ProductSearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_products(5, 'montre', description="Montre automatique en acier")
+        self.create_products(2, 'bague', description="Bague en argent")
+
+    def search(self, **params):
+        response = self.client.get(reverse('api-product-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_results_are_capped_by_limit(self):
+        results = self.search(q="automatique", limit=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(self.search(q="automatique")), 5)
+        self.assertEqual(len(self.search(q="automatique", limit='abc')), 5)
+
+    def test_results_carry_a_snippet(self):
+        result, = self.search(q="argent", limit=1)
+        self.assertIn("<mark>argent</mark>", result['snippet'])
+
+class ProductBatchTests(CatalogTestCase):
+    def test_results_in_requested_order(self):
+        self.create_products(3)
+        response = self.client.post(
+            reverse('api-product-batch'), {'slugs': ['produit-2', 'inconnu', 'produit-0']}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([product['slug'] for product in data['results']], ['produit-2', 'produit-0'])
+        self.assertEqual(data['missing'], ['inconnu'])
+
+    def test_body_must_be_an_object(self):
+        response = self.client.post(reverse('api-product-batch'), ['produit-0'], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+class PrimaryReadsTests(SimpleTestCase):
+    def setUp(self):
+        self.state = RoutingState()
+        token = _state.set(self.state)
+        self.addCleanup(_state.reset, token)
+
+    def test_pin_released_after_block(self):
+        with primary_reads():
+            self.assertTrue(self.state.pinned)
+        self.assertFalse(self.state.pinned)
+
+    def test_write_inside_block_keeps_pin(self):
+        with primary_reads():
+            self.assertEqual(ReplicaRouter().db_for_write(Product), PRIMARY)
+        self.assertTrue(self.state.pinned)
+
+class SitemapTests(CatalogTestCase):
+    def test_last_modified_allows_304(self):
+        url = reverse('sitemap-categories')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+class QueryBudgetTests(CatalogTestCase):
+    """Le nombre de requêtes ne dépend pas du nombre de lignes renvoyées (budgets de check_query_budget)"""
+
+    def setUp(self):
+        super().setUp()
+        for category_index in range(2):
+            category = self.category if category_index == 0 else Category.objects.create(
+                name=f"Catégorie {category_index}", slug=f'categorie-{category_index}', is_published=True,
+            )
+            for subcategory_index in range(2):
+                subcategory = SubCategory.objects.create(
+                    category=category, name=f"Sous-catégorie {category_index}-{subcategory_index}",
+                    slug=f'sous-categorie-{category_index}-{subcategory_index}', is_published=True,
+                )
+                products = self.create_products(
+                    3, f'produit-{category_index}-{subcategory_index}', category=category, subcategory=subcategory,
+                )
+                for product in products:
+                    for image_index in range(2):
+                        ProductImage.objects.create(
+                            product=product, image=f'https://example.com/{product.slug}-{image_index}.jpg',
+                            is_main=image_index == 0,
+                        )
+        self.product = products[0]
+
+    def assertWithinBudget(self, name, url, params=None):
+        # Cache vide à chaque mesure, comme check_query_budget
+        cache.clear()
+        with self.assertNumQueries(QUERY_BUDGETS[name]):
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_list(self):
+        self.assertWithinBudget('api-product-list', reverse('api-product-list'), {'page_size': 100})
+
+    def test_product_detail(self):
+        self.assertWithinBudget('api-product-detail', reverse('api-product-detail', args=[self.product.slug]))
+
+    def test_category_endpoints(self):
+        self.assertWithinBudget('api-category-list', reverse('api-category-list'))
+        self.assertWithinBudget('api-category-detail', reverse('api-category-detail', args=[self.category.slug]))
+        self.assertWithinBudget('api-category-products', reverse('api-category-products', args=[self.category.slug]))
+
+class AsyncCatalogViewTests(TestCase):
+    async def test_options_uses_drf_metadata(self):
+        request = AsyncRequestFactory().options(reverse('api-category-list'))
+        response = await CategoryListAsyncView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        response.render()
+        self.assertIn('renders', response.data)
+        self.assertEqual(response['Allow'], 'GET, HEAD, OPTIONS')
+
+class ServerTimingTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = get_user_model().objects.create_user(
+            'admin@example.com', 'motdepasse', username='admin', first_name="Admin", last_name="Admin", is_staff=True,
+        )
+
+    def test_header_reserved_to_staff_by_default(self):
+        url = reverse('api-category-list')
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(self.staff)
+        self.assertIn('Server-Timing', self.client.get(url))
+
+    def test_jwt_staff_authenticated_once(self):
+        token = RefreshToken.for_user(self.staff).access_token
+        url = reverse('api-category-list')
+        with CaptureQueriesContext(connection) as anonymous:
+            self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as authenticated:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertIn('Server-Timing', response)
+        # Seule la lecture de l'utilisateur par l'authentification DRF s'ajoute
+        self.assertEqual(len(authenticated), len(anonymous) + 1)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_on_every_response_when_enabled(self):
+        self.assertIn('Server-Timing', self.client.get(reverse('api-category-list')))
+
+class SalesCountTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product, = self.create_products(1)
+        user = get_user_model().objects.create_user(
+            'client@example.com', 'motdepasse', username='client', first_name="Client", last_name="Client",
+        )
+        self.order = Order.objects.create(
+            user=user, order_number='CMD-1', payment_method='credit_card', total_price='20.00',
+        )
+
+    def test_sale_updates_counter_without_invalidating_catalog(self):
+        updated_at = Product.objects.get(pk=self.product.pk).updated_at
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=self.order, product=self.product, quantity=2, price='10.00')
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(product.sales_count, 2)
+        self.assertEqual(product.updated_at, updated_at)
+        self.assertEqual(get_catalog_version(), version)
+
+    def test_popularity_etag_follows_sales(self):
+        url = reverse('api-product-list')
+        etag = self.client.get(url, {'sort_by': 'popularity'})['ETag']
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=1, price='10.00')
+        response = self.client.get(url, {'sort_by': 'popularity'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+class FacetsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_products(2, 'montre', description="Montre automatique")
+        other = Category.objects.create(name="Robes", slug='robes', is_published=True)
+        self.create_products(1, 'robe', category=other, price='60.00', stock=4, description="Robe en soie")
+
+    def facets(self, **params):
+        response = self.client.get(reverse('api-product-list'), {'facets': '1', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['facets']
+
+    def test_counts(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual({c['slug']: c['count'] for c in facets['categories']}, {'montres': 2, 'robes': 1})
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [2, 0, 1, 0, 0])
+        self.assertEqual(facets['availability'], {'in_stock': 1, 'out_of_stock': 2})
+
+    def test_filters(self):
+        self.assertEqual(self.facets(category='robes')['total'], 1)
+        self.assertEqual(self.facets(max_price='50')['total'], 2)
+        self.assertEqual(self.facets(search="automatique")['total'], 2)
+
+    def test_cache_key_keeps_slug_case(self):
+        # Le filtre de catégorie respecte la casse : deux jeux de résultats, deux entrées de cache
+        self.assertEqual(self.facets(category='robes')['total'], 1)
+        self.assertEqual(self.facets(category='Robes')['total'], 0)
+        self.assertNotEqual(facets_cache_key('list', {'category': 'Robes'}), facets_cache_key('list', {'category': 'robes'}))
+        # La recherche ignore la casse : une seule entrée
+        self.assertEqual(
+            facets_cache_key('list', {'search': "Automatique ", 'category': None}),
+            facets_cache_key('list', {'search': "automatique"}),
+        )
+
+@override_settings(CATALOG_FEED_TOKEN='secret-du-flux')
+class ProductExportTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_products(2)
+        self.create_products(1, 'brouillon', is_published=False)
+
+    def export(self, **headers):
+        return self.client.get(reverse('api-product-export'), {'output': headers.pop('output', 'ndjson')}, **headers)
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_rows(self):
+        lines = self.content(self.export(HTTP_X_FEED_TOKEN='secret-du-flux')).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['slug'] for row in rows], ['produit-0', 'produit-1'])
+        self.assertEqual(rows[0]['category_name'], "Montres")
+        self.assertEqual(rows[0]['images'], [])
+
+    def test_csv_rows(self):
+        content = self.content(self.export(output='csv', HTTP_X_FEED_TOKEN='secret-du-flux'))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['slug'] for row in rows], ['produit-0', 'produit-1'])
+        self.assertEqual(rows[0]['available'], 'true')
+
+    def test_token_required(self):
+        self.assertEqual(self.export().status_code, 403)
+        self.assertEqual(self.export(HTTP_X_FEED_TOKEN='mauvais').status_code, 403)
+        # Le jeton n'est plus accepté dans l'URL
+        response = self.client.get(reverse('api-product-export'), {'token': 'secret-du-flux'})
+        self.assertEqual(response.status_code, 403)
+
+class ConditionalRequestTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product, = self.create_products(1)
+        self.urls = [
+            reverse('api-product-list'),
+            reverse('api-product-detail', args=[self.product.slug]),
+            reverse('api-category-products', args=[self.category.slug]),
+        ]
+
+    def validators(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag'], response['Last-Modified']
+
+    def test_unchanged_resources_return_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag, last_modified = self.validators(url)
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def assertChangedBy(self, change):
+        etags = {url: self.validators(url)[0] for url in self.urls}
+        change()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_update_changes_validators(self):
+        def change():
+            self.product.price = '12.00'
+            self.product.save()
+        self.assertChangedBy(change)
+
+    def test_image_change_changes_validators(self):
+        self.assertChangedBy(lambda: ProductImage.objects.create(
+            product=self.product, image='https://example.com/produit.jpg', is_main=True,
+        ))
+
+class ImageSrcsetTests(SimpleTestCase):
+    base = 'https://res.cloudinary.com/demo/image/upload'
+
+    def test_cloudinary_srcset(self):
+        srcset = image_srcset(f'{self.base}/v1712/produits/montre.jpg')
+        self.assertEqual(srcset, ', '.join(
+            f'{self.base}/c_limit,w_{width},f_auto,q_auto/v1712/produits/montre.jpg {width}w'
+            for width in (200, 400, 800, 1600)
+        ))
+        self.assertEqual(RESPONSIVE_WIDTHS, (200, 400, 800, 1600))
+
+    def test_existing_transformations_are_kept_once(self):
+        # Transformation d'origine conservée, variante précédente remplacée et non empilée
+        url = 'http://res.cloudinary.com/demo/image/upload/e_sharpen/c_limit,w_400,f_auto,q_auto/v1/montre.jpg'
+        self.assertEqual(responsive_url(url, 800), f'{self.base}/e_sharpen/c_limit,w_800,f_auto,q_auto/v1/montre.jpg')
+        self.assertEqual(original_url(url), f'{self.base}/e_sharpen/v1/montre.jpg')
+        first = image_srcset(url).split(', ')[0]
+        self.assertEqual(first, f'{self.base}/e_sharpen/c_limit,w_200,f_auto,q_auto/v1/montre.jpg 200w')
+
+    def test_other_urls(self):
+        self.assertIsNone(image_srcset('https://images.unsplash.com/photo-1523170335258-f5ed11844a49'))
+        self.assertIsNone(image_srcset(''))
+        self.assertEqual(responsive_url('https://example.com/montre.jpg', 400), 'https://example.com/montre.jpg')
@@ -1,5 +1,4 @@
 from django.shortcuts import render
-from django.db.models import Q
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,8 +10,11 @@ from .serializers import (
     SubCategorySerializer,
     ProductSerializer,
     ProductDetailSerializer,
-    ProductImageSerializer
+    ProductImageSerializer,
+    ProductSearchSerializer
 )
+from .featured import FEATURED_LIMIT, FEATURED_ORDERING, get_featured_snapshot, is_snapshot_servable, snapshot_response
+from .search import SEARCH_MAX_LIMIT, search_products
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 12
@@ -31,15 +33,20 @@ class CategoryViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    def get_queryset(self):
+        return CategorySerializer.setup_eager_loading(super().get_queryset(), self.request)
+    
     @action(detail=True, methods=['get'])
     def products(self, request, slug=None):
         category = self.get_object()
-        products = Product.objects.filter(category=category, available=True)
+        products = ProductSerializer.setup_eager_loading(
+            Product.objects.filter(category=category, available=True), request
+        )
         
         paginator = StandardResultsSetPagination()
         result_page = paginator.paginate_queryset(products, request)
         
-        serializer = ProductSerializer(result_page, many=True)
+        serializer = ProductSerializer(result_page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
 
 class SubCategoryViewSet(viewsets.ModelViewSet):
@@ -54,24 +61,28 @@ class SubCategoryViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    def get_queryset(self):
+        return SubCategorySerializer.setup_eager_loading(super().get_queryset(), self.request)
+    
     @action(detail=True, methods=['get'])
     def products(self, request, slug=None):
         subcategory = self.get_object()
-        products = Product.objects.filter(subcategory=subcategory, available=True)
+        products = ProductSerializer.setup_eager_loading(
+            Product.objects.filter(subcategory=subcategory, available=True), request
+        )
         
         paginator = StandardResultsSetPagination()
         result_page = paginator.paginate_queryset(products, request)
         
-        serializer = ProductSerializer(result_page, many=True)
+        serializer = ProductSerializer(result_page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def by_category(self, request):
         category_slug = request.query_params.get('category', None)
         if category_slug:
-            subcategories = SubCategory.objects.filter(
-                category__slug=category_slug, 
-                is_published=True
+            subcategories = SubCategorySerializer.setup_eager_loading(
+                SubCategory.objects.filter(category__slug=category_slug, is_published=True), request
             )
         else:
             subcategories = self.get_queryset()
@@ -98,11 +109,21 @@ class ProductViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
+        if self.action == 'search':
+            return ProductSearchSerializer
         return ProductSerializer
     
+    def get_queryset(self):
+        serializer_class = self.get_serializer_class()
+        return serializer_class.setup_eager_loading(super().get_queryset(), self.request)
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
-        featured_products = Product.objects.filter(featured=True, available=True)[:8]
+        if is_snapshot_servable(request):
+            return snapshot_response(get_featured_snapshot())
+        featured_products = self.get_queryset().filter(
+            featured=True, is_published=True
+        ).order_by(*FEATURED_ORDERING)[:FEATURED_LIMIT]
         serializer = self.get_serializer(featured_products, many=True)
         return Response(serializer.data)
     
@@ -113,13 +134,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         min_price = request.query_params.get('min_price', None)
         max_price = request.query_params.get('max_price', None)
         
-        products = Product.objects.filter(available=True)
-        
-        if query:
-            products = products.filter(
-                Q(name__icontains=query) | 
-                Q(description__icontains=query)
-            )
+        products = self.get_queryset()
         
         if category:
             products = products.filter(category__slug=category)
@@ -130,6 +145,10 @@ class ProductViewSet(viewsets.ModelViewSet):
         if max_price:
             products = products.filter(price__lte=max_price)
         
+        # Filtres appliqués avant la recherche : le plafond porte sur les produits retenus
+        if query:
+            products = search_products(products, query, limit=SEARCH_MAX_LIMIT)
+        
         paginator = self.pagination_class()
         result_page = paginator.paginate_queryset(products, request)
         
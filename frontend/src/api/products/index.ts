@@ -19,6 +19,9 @@ export interface Product {
   subcategory_name?: string;
   images: ProductImage[];
   created_at: string;
+  // Vue carte (?view=card) : remplace images
+  main_image_url?: string | null;
+  image_count?: number;
   // Propriétés additionnelles
   discount_percentage?: number;
   is_new?: boolean;
@@ -31,6 +34,8 @@ export interface ProductImage {
   image: string;
   image_url: string;
   is_main: boolean;
+  // Variantes Cloudinary de largeur bornée (200w à 1600w), null hors Cloudinary
+  srcset?: string | null;
 }
 
 export interface Category {
@@ -88,6 +93,11 @@ const safeApiCall = async <T>(apiCall: Promise<{ data: unknown }>): Promise<T[]>
     if (Array.isArray(response.data)) {
       return response.data as T[];
     }
+    // Réponse paginée par curseur : { next, previous, results }
+    const page = response.data as { results?: unknown };
+    if (page && Array.isArray(page.results)) {
+      return page.results as T[];
+    }
     // Si la réponse est un objet JSON valide mais pas un tableau
     if (response.data && typeof response.data === 'object') {
       console.warn('API a renvoyé un objet au lieu d\'un tableau:', response.data);
@@ -102,7 +112,46 @@ const safeApiCall = async <T>(apiCall: Promise<{ data: unknown }>): Promise<T[]>
   }
 };
 
-// Fonctions pour récupérer les données des produits
+// Filtres et tri de /products/, appliqués côté serveur
+export interface ProductListFilters {
+  category?: string | null;
+  subcategory?: string | null;
+  search?: string | null;
+  min_price?: number | null;
+  max_price?: number | null;
+  sort_by?: 'newest' | 'oldest' | 'price_asc' | 'price_desc' | 'name_asc' | 'name_desc' | 'popularity';
+  // Compte total et répartition des produits filtrés, renvoyés avec la première page
+  facets?: boolean;
+}
+
+// Page d'une liste paginée par curseur (24 produits par défaut)
+export interface ProductPage {
+  results: Product[];
+  next: string | null;
+  previous: string | null;
+  facets?: { total: number };
+}
+
+const EMPTY_PAGE: ProductPage = { results: [], next: null, previous: null };
+
+// Première page des produits filtrés, ou page suivante en suivant le lien `next`
+// (curseur) renvoyé par la page précédente
+export const getProductPage = async (filters: ProductListFilters = {}, next?: string | null): Promise<ProductPage> => {
+  try {
+    const params = Object.fromEntries(
+      Object.entries(filters).filter(([, value]) => value !== null && value !== undefined && value !== '' && value !== false)
+    );
+    const response = next
+      ? await axios.get<ProductPage>(next)
+      : await axios.get<ProductPage>(`${API_URL}/products/`, { params });
+    return Array.isArray(response.data?.results) ? response.data : EMPTY_PAGE;
+  } catch (error) {
+    console.error('Erreur lors de la récupération des produits:', error);
+    return EMPTY_PAGE;
+  }
+};
+
+// Fonctions pour récupérer les données des produits (première page de chaque liste)
 export const getProducts = async () => {
   try {
     return await safeApiCall<Product>(axios.get(`${API_URL}/products/`));
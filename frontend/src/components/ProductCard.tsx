@@ -27,6 +27,9 @@ const ProductCard: React.FC<ProductCardProps> = ({
     ? priceValue * (1 - discount / 100)
     : null;
 
+  // Image principale, ou à défaut la première
+  const mainImage = product.images?.find(img => img.is_main) || product.images?.[0];
+
   // Détermination des badges à afficher
   const productBadges = [];
   
@@ -105,7 +108,7 @@ const ProductCard: React.FC<ProductCardProps> = ({
         {/* Image du produit - taille fixe et uniforme */}
         <div className="relative overflow-hidden bg-gray-100">
           <div className="aspect-[1/1] w-full h-[300px]">
-            {product.images && product.images.length > 0 ? (
+            {mainImage ? (
               <motion.div
                 className="w-full h-full bg-gray-50"
                 initial={{ opacity: 0 }}
@@ -113,7 +116,9 @@ const ProductCard: React.FC<ProductCardProps> = ({
                 transition={{ duration: 0.5 }}
               >
                 <motion.img 
-                  src={product.images.find(img => img.is_main)?.image_url || product.images[0].image_url} 
+                  src={mainImage.image_url} 
+                  srcSet={mainImage.srcset || undefined}
+                  sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
                   alt={product.name} 
                   className="w-full h-full object-cover object-center"
                   whileHover={{ scale: 1.08 }}
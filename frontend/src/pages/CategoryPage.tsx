@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { Category, Product, getProductsByCategory, getCategories, getCategoryImageUrl } from '../api/products';
+import { Category, Product, getProductPage, getCategories, getCategoryImageUrl } from '../api/products';
 import ProductsGrid from '../components/ProductsGrid';
 import { fadeIn, fadeInUp, staggeredList, staggeredItem } from '../utils/animations';
 
@@ -11,6 +11,10 @@ const CategoryPage: React.FC = () => {
   
   const [category, setCategory] = useState<Category | null>(null);
   const [products, setProducts] = useState<Product[]>([]);
+  // Pagination par curseur : lien de la page suivante et total des produits de la catégorie
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [totalCount, setTotalCount] = useState<number | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [relatedCategories, setRelatedCategories] = useState<Category[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -48,11 +52,11 @@ const CategoryPage: React.FC = () => {
         
         setCategory(currentCategory);
         
-        // Charger les produits de cette catégorie
-        const categoryProductsData = await getProductsByCategory(slug);
-        // S'assurer que c'est un tableau
-        const categoryProducts = Array.isArray(categoryProductsData) ? categoryProductsData : [];
-        setProducts(categoryProducts);
+        // Charger la première page des produits de cette catégorie
+        const page = await getProductPage({ category: slug, facets: true });
+        setProducts(page.results);
+        setNextPage(page.next);
+        setTotalCount(page.facets?.total ?? null);
         
         // Sélectionner quelques catégories connexes (toutes sauf la catégorie actuelle)
         const otherCategories = allCategories.filter(cat => cat.slug !== slug);
@@ -67,6 +71,7 @@ const CategoryPage: React.FC = () => {
         console.error('Erreur lors du chargement de la catégorie:', err);
         setError('Erreur lors du chargement de la catégorie. Veuillez réessayer plus tard.');
         setProducts([]);
+        setNextPage(null);
         setRelatedCategories([]);
       } finally {
         setLoading(false);
@@ -76,6 +81,16 @@ const CategoryPage: React.FC = () => {
     fetchCategoryData();
   }, [slug, navigate]);
 
+  // Page suivante, ajoutée à la suite des produits déjà affichés
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    const page = await getProductPage({}, nextPage);
+    setProducts(previous => [...previous, ...page.results]);
+    setNextPage(page.next);
+    setLoadingMore(false);
+  };
+
   // État de chargement
   if (loading) {
     return (
@@ -168,7 +183,7 @@ const CategoryPage: React.FC = () => {
             )}
             <div className="flex items-center text-sm text-gray-500">
               <span className="bg-primary-100 text-primary-800 px-3 py-1 rounded-full">
-                {products.length} produits disponibles
+                {totalCount ?? products.length} produits disponibles
               </span>
             </div>
           </div>
@@ -178,10 +193,23 @@ const CategoryPage: React.FC = () => {
       {/* Grille de produits */}
       <div className="mb-16">
         {products.length > 0 ? (
-          <ProductsGrid 
-            title={`Produits ${category.name}`}
-            products={products}
-          />
+          <>
+            <ProductsGrid 
+              title={`Produits ${category.name}`}
+              products={products}
+            />
+            {nextPage && (
+              <div className="mt-8 flex justify-center">
+                <motion.button 
+                  className="px-6 py-3 bg-primary-600 text-white rounded-full hover:bg-primary-700 transition-colors shadow-sm disabled:opacity-60"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Chargement...' : 'Voir plus de produits'}
+                </motion.button>
+              </div>
+            )}
+          </>
         ) : (
           <motion.div 
             className="text-center bg-white p-12 rounded-2xl shadow-sm"
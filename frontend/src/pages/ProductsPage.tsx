@@ -3,22 +3,26 @@ import { useLocation, useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import ProductsGrid from '../components/ProductsGrid';
 import SearchBar from '../components/SearchBar';
-import Pagination from '../components/Pagination';
 import { Card, Button, Badge, SectionTitle } from '../components/ui';
 import { components, typography, animations } from '../utils/designSystem';
 import { 
   getCategories, 
   getSubCategoriesByCategory, 
-  getProductsByCategory, 
-  getProductsBySubCategory,
-  getProducts, 
+  getProductPage,
   searchProducts, 
   Category, 
   SubCategory, 
-  Product 
+  Product,
+  ProductListFilters
 } from '../api/products';
 
-const PRODUCTS_PER_PAGE = 12;
+// Options du menu de tri -> tri de l'API (?sort_by=)
+const SORT_OPTIONS: Record<string, ProductListFilters['sort_by']> = {
+  'newest': 'newest',
+  'alphabetical': 'name_asc',
+  'price-low': 'price_asc',
+  'price-high': 'price_desc',
+};
 
 const ProductsPage = () => {
   const location = useLocation();
@@ -33,7 +37,6 @@ const ProductsPage = () => {
   const [categories, setCategories] = useState<Category[]>([]);
   const [subCategories, setSubCategories] = useState<SubCategory[]>([]);
   const [products, setProducts] = useState<Product[]>([]);
-  const [filteredProducts, setFilteredProducts] = useState<Product[]>([]);
   const [priceRange, setPriceRange] = useState({ min: 0, max: 1000 });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
@@ -43,13 +46,13 @@ const ProductsPage = () => {
   const [viewMode, setViewMode] = useState<'grid' | 'list'>('grid');
   const [showFilters, setShowFilters] = useState(false);
   
-  // Pagination
-  const [currentPage, setCurrentPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
-  const [paginatedProducts, setPaginatedProducts] = useState<Product[]>([]);
+  // Pagination par curseur : lien de la page suivante et total des produits filtrés
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [totalCount, setTotalCount] = useState<number | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Statistiques
-  const totalProducts = products.length;
+  const totalProducts = totalCount ?? products.length;
   const avgPrice = products.length > 0 ? (products.reduce((sum, p) => sum + parseFloat(p.price), 0) / products.length).toFixed(0) : 0;
 
   useEffect(() => {
@@ -104,41 +107,36 @@ const ProductsPage = () => {
     const fetchProducts = async () => {
       try {
         setLoading(true);
-        let data: Product[] = [];
+        const hasPriceFilter = priceRange.min > 0 || priceRange.max < 1000;
         
-        // Si on a une recherche
+        // Recherche : résultats classés par pertinence (liste bornée), filtrés et triés ici
         if (searchQuery) {
-          data = await searchProducts(searchQuery);
-        }
-        // Si une sous-catégorie est sélectionnée
-        else if (selectedSubCategory) {
-          data = await getProductsBySubCategory(selectedSubCategory);
-        }
-        // Si une catégorie est sélectionnée
-        else if (selectedCategory) {
-          data = await getProductsByCategory(selectedCategory);
+          let data = await searchProducts(searchQuery);
+          if (hasPriceFilter) {
+            data = data.filter(product => {
+              const price = parseFloat(product.price);
+              return price >= priceRange.min && price <= priceRange.max;
+            });
+          }
+          setProducts(sortProducts(data, sortOption));
+          setNextPage(null);
+          setTotalCount(data.length);
         }
-        // Sinon tous les produits
+        // Sinon : filtres et tri côté serveur, une page à la fois
         else {
-          data = await getProducts();
-        }
-        
-        // Filtrer par prix
-        if (priceRange.min > 0 || priceRange.max < 1000) {
-          data = data.filter(product => {
-            const price = parseFloat(product.price);
-            return price >= priceRange.min && price <= priceRange.max;
+          const page = await getProductPage({
+            category: selectedCategory,
+            subcategory: selectedSubCategory,
+            min_price: hasPriceFilter ? priceRange.min : null,
+            max_price: hasPriceFilter ? priceRange.max : null,
+            sort_by: SORT_OPTIONS[sortOption] ?? 'newest',
+            facets: true,
           });
+          setProducts(page.results);
+          setNextPage(page.next);
+          setTotalCount(page.facets?.total ?? null);
         }
         
-        // Trier les produits
-        data = sortProducts(data, sortOption);
-        
-        setProducts(data);
-        setFilteredProducts(data);
-        setTotalPages(Math.ceil(data.length / PRODUCTS_PER_PAGE));
-        setCurrentPage(1);
-        
         // Mettre à jour les filtres actifs
         const filters = [];
         if (searchQuery) filters.push(`Recherche: "${searchQuery}"`);
@@ -150,7 +148,7 @@ const ProductsPage = () => {
           const subCategoryName = subCategories.find(sc => sc.slug === selectedSubCategory)?.name || selectedSubCategory;
           filters.push(`Sous-catégorie: "${subCategoryName}"`);
         }
-        if (priceRange.min > 0 || priceRange.max < 1000) {
+        if (hasPriceFilter) {
           filters.push(`Prix: ${priceRange.min}€ - ${priceRange.max}€`);
         }
         setActiveFilters(filters);
@@ -166,12 +164,15 @@ const ProductsPage = () => {
     fetchProducts();
   }, [searchQuery, selectedCategory, selectedSubCategory, priceRange, sortOption, categories, subCategories]);
 
-  // Mise à jour des produits paginés
-  useEffect(() => {
-    const startIndex = (currentPage - 1) * PRODUCTS_PER_PAGE;
-    const endIndex = startIndex + PRODUCTS_PER_PAGE;
-    setPaginatedProducts(filteredProducts.slice(startIndex, endIndex));
-  }, [filteredProducts, currentPage]);
+  // Page suivante, ajoutée à la suite des produits déjà affichés
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    const page = await getProductPage({}, nextPage);
+    setProducts(previous => [...previous, ...page.results]);
+    setNextPage(page.next);
+    setLoadingMore(false);
+  };
 
   const sortProducts = (productsList: Product[], option: string) => {
     const sortedProducts = [...productsList];
@@ -258,11 +259,6 @@ const ProductsPage = () => {
     }
   };
   
-  const handlePageChange = (page: number) => {
-    setCurrentPage(page);
-    window.scrollTo({ top: 0, behavior: 'smooth' });
-  };
-
   // Composant Header moderne avec statistiques
   const ModernHeader = () => (
     <motion.div
@@ -656,17 +652,19 @@ const ProductsPage = () => {
               >
                   <ProductsGrid 
                     title="" 
-                    products={paginatedProducts}
+                    products={products}
                   />
                   
-                  {/* Pagination */}
-                  {totalPages > 1 && (
-                  <div className="mt-8 pt-6 border-t border-gray-100">
-                      <Pagination 
-                        currentPage={currentPage}
-                        totalPages={totalPages}
-                        onPageChange={handlePageChange}
-                      />
+                  {/* Page suivante */}
+                  {nextPage && (
+                  <div className="mt-8 pt-6 border-t border-gray-100 flex justify-center">
+                      <Button 
+                        variant="outlined"
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                      >
+                        {loadingMore ? 'Chargement...' : 'Voir plus de produits'}
+                      </Button>
                     </div>
                   )}
               </motion.div>